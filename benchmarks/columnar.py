@@ -0,0 +1,54 @@
+"""Compare execute_columnar against ORM hydration plus per-object conversion.
+
+Usage: python -m benchmarks.columnar [rows]
+"""
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+import json_to_sql
+from json_to_sql.columnar import execute_columnar
+from json_to_sql.schemas import FilterSchema
+from tests.petstore import Base, Dog
+
+COLUMNS = ['id', 'name', 'dob', 'weight']
+
+def populate(engine, rows:int)->None:
+    Base.metadata.create_all(engine)
+    start = date(2000, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, 100_000):
+            conn.execute(Dog.__table__.insert(), [
+                {'name': f'dog{i}', 'dob': start + timedelta(days=i % 5000), 'weight': i % 100}
+                for i in range(offset, min(offset + 100_000, rows))
+            ])
+
+def orm_hydration(session, filters)->dict:
+    dogs = session.scalars(json_to_sql.build_query(Dog, filters)).all()
+    return {
+        'id': np.array([d.id for d in dogs], dtype=np.int64),
+        'name': np.array([d.name for d in dogs], dtype=object),
+        'dob': np.array([d.dob for d in dogs], dtype='datetime64[D]'),
+        'weight': np.array([d.weight for d in dogs], dtype=np.float64),
+    }
+
+def columnar(session, filters)->dict:
+    return execute_columnar(session, Dog, filters, columns=COLUMNS)
+
+def main(rows:int)->None:
+    engine = sa.create_engine('sqlite://')
+    populate(engine, rows)
+    filters = [FilterSchema(field="weight", op=">=", value=0)]
+    for name, run in [('orm hydration', orm_hydration), ('execute_columnar', columnar)]:
+        with orm.Session(engine) as session:
+            started = time.perf_counter()
+            result = run(session, filters)
+            elapsed = time.perf_counter() - started
+        print(f"{name:>18}: {elapsed:.2f}s for {len(result['id'])} rows")
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -1,13 +1,19 @@
 from typing import TYPE_CHECKING, List, Union, Any
 from collections import defaultdict
-from sqlalchemy.sql.expression import Select
+from sqlalchemy.sql.expression import Select, FromClause, Alias
 from sqlalchemy import orm
 import sqlalchemy as sa
 from json_to_sql.schemas import deserialize_filters
+from json_to_sql.registry import ResolutionTable
+from json_to_sql.cost import CostPolicy
+from json_to_sql.json_paths import JSONPath, is_json_column, fill_json_tree
+from json_to_sql.watermarks import decode_watermark
 
 if TYPE_CHECKING:
     from json_to_sql.schemas import FilterSchema
 from json_to_sql.filters.filters import Filter
+
+ORDER_BY_GROUP = '__order_by__'
     
 def group_filters_by_condition_group(filters:list[Filter])->dict[str, Filter]:
     grouped = defaultdict(list)
@@ -27,33 +33,152 @@ def get_attrib_from_tree(tree:dict, fields:list[str])->Any:
         attrib = attrib[field]
     return attrib
         
-def convert_to_tree(filters:list[Filter])->dict:
+def convert_to_tree(filters:list[Filter], paths:list[list[str]]=())->dict:
     tree = {}
-    for f in filters:
+    for fields in [f.fields for f in filters] + list(paths):
         current = tree
-        for part in f.fields[:-1]:
+        for part in fields[:-1]:
             current = current.setdefault(part, {})
-        current[f.fields[-1]] = None
+        current[fields[-1]] = None
     return tree
 
-def get_internal_db_field(field:str, property_map:dict|None):
+def get_internal_db_field(field:str, property_map:dict|ResolutionTable|None):
+    if isinstance(property_map, ResolutionTable):
+        return property_map.resolve(field).name
     if not property_map:
         return field
     return property_map.get(field, field) #Return the same field in no mapping is defined
+
+def get_nested_property_map(field:str, property_map:dict|ResolutionTable|None):
+    if isinstance(property_map, ResolutionTable):
+        return property_map.resolve(field).nested
+    return property_map #A flat property_map applies to every nesting level
     
+def is_core(class_:Any)->bool:
+    """True for Core tables and other selectables, False for ORM mapped classes."""
+    return isinstance(class_, FromClause)
+
+def get_column(class_:Any, fieldname:str)->Any:
+    if is_core(class_):
+        return class_.c[fieldname]
+    return getattr(class_, fieldname)
+
+def get_primary_key(class_:Any)->list:
+    if is_core(class_):
+        return list(class_.primary_key)
+    mapper = sa.inspect(class_).mapper
+    return [getattr(class_, mapper.get_property_by_column(column).key) for column in mapper.primary_key]
+
+def get_json_column(class_:Any, fieldname:str)->Any:
+    column = class_.c.get(fieldname) if is_core(class_) else getattr(class_, fieldname)
+    return column if column is not None and is_json_column(column) else None
+
+def get_foreign_key_join(selectable:FromClause, name:str)->tuple[sa.Table, list[tuple[str, str]]]:
+    """Find the table called name that selectable references, or that
+    references selectable, through exactly one foreign key.
+
+    Returns that table and the (local, remote) column key pairs to join on.
+    """
+    table = selectable.element if isinstance(selectable, Alias) else selectable
+    candidates = []
+    for constraint in getattr(table, 'foreign_key_constraints', ()):
+        if constraint.referred_table.name == name:
+            pairs = [(e.parent.key, e.column.key) for e in constraint.elements]
+            candidates.append((constraint.referred_table, pairs))
+    metadata = getattr(table, 'metadata', None)
+    for other in metadata.tables.values() if metadata is not None else ():
+        if other.name != name:
+            continue
+        for constraint in other.foreign_key_constraints:
+            if constraint.referred_table is table:
+                pairs = [(e.column.key, e.parent.key) for e in constraint.elements]
+                candidates.append((other, pairs))
+    if not candidates:
+        raise KeyError('No foreign key between {} and {}'.format(table.name, name), None)
+    if len(candidates) > 1:
+        raise ValueError(f"Multiple foreign keys between {table.name} and {name}, the join is ambiguous", None)
+    return candidates[0]
+
+def is_to_many(class_:Any, fieldname:str)->bool:
+    """True when the relation fieldname of class_ can join more than one row."""
+    if not is_core(class_):
+        return sa.inspect(class_).mapper.relationships[fieldname].uselist
+    nested_table, pairs = get_foreign_key_join(class_, fieldname)
+    table = class_.element if isinstance(class_, Alias) else class_
+    if any(c.referred_table is nested_table for c in getattr(table, 'foreign_key_constraints', ())):
+        return False #Many-to-one, class_ holds the foreign key
+    remote = {nested_table.c[rc] for _, rc in pairs}
+    unique = [set(nested_table.primary_key)] + [
+        set(c.columns) for c in nested_table.constraints if isinstance(c, sa.UniqueConstraint)
+    ] + [{c} for c in nested_table.c if c.unique]
+    return not any(columns and columns <= remote for columns in unique)
+
+def iter_relations(class_:Any, fields:list[str], property_map:dict|ResolutionTable|None):
+    """Yield (class_, fieldname, nested_class_, nested_property_map) for every
+    relation a path is joined through, stopping where the path continues
+    inside a JSON column."""
+    for field in fields[:-1]:
+        fieldname = get_internal_db_field(field, property_map)
+        if get_json_column(class_, fieldname) is not None:
+            return
+        if is_core(class_):
+            nested_class_, _ = get_foreign_key_join(class_, fieldname)
+        else:
+            nested_class_ = getattr(class_, fieldname).mapper.class_
+        nested_property_map = get_nested_property_map(field, property_map)
+        yield class_, fieldname, nested_class_, nested_property_map
+        class_, property_map = nested_class_, nested_property_map
+
+def get_join_path(class_:Any, fields:list[str], property_map:dict|ResolutionTable|None)->tuple:
+    """The part of fields that is joined, a path into a JSON column ends at that column."""
+    joins = sum(1 for _ in iter_relations(class_, fields, property_map))
+    return tuple(fields[:joins + 1])
+
+def get_json_path(class_:Any, fields:list[str], property_map:dict|ResolutionTable|None)->Union[JSONPath, None]:
+    """The JSON column and the path inside it that fields ends in, None for
+    paths that do not continue inside a JSON column."""
+    joins = 0
+    for _, _, class_, property_map in iter_relations(class_, fields, property_map):
+        joins += 1
+    if joins == len(fields) - 1:
+        return None
+    column = get_json_column(class_, get_internal_db_field(fields[joins], property_map))
+    return JSONPath(column, tuple(fields[joins + 1:]))
+
+def check_to_one_path(class_:Any, fields:list[str], property_map:dict|ResolutionTable|None)->None:
+    """Reject paths through to-many relations, joining them would repeat rows."""
+    for current, fieldname, _, _ in iter_relations(class_, fields, property_map):
+        if is_to_many(current, fieldname):
+            raise ValueError(f"Cannot order by {'.'.join(fields)}, it passes through a collection", None)
+
 def join_required_relations(
     stmt:Select,
     class_:Any,
     tree:dict,
-    property_map:dict,
-    condition_group:str
+    property_map:dict|ResolutionTable|None,
+    condition_group:str,
+    isouter:bool=False
 )->Select:
     for k, v in tree.items():
         if v == None:
             fieldname = get_internal_db_field(k, property_map)
-            tree[k] = getattr(class_, fieldname)
+            tree[k] = get_column(class_, fieldname)
             continue
         fieldname = get_internal_db_field(k, property_map)
+        json_column = get_json_column(class_, fieldname)
+        if json_column is not None:
+            # The rest of the path lives inside the JSON document, no join needed
+            fill_json_tree(tree[k], json_column)
+            continue
+        if is_core(class_):
+            nested_table, pairs = get_foreign_key_join(class_, fieldname)
+            nested_class_ = nested_table.alias()
+            join_condition = sa.and_(*[class_.c[lc] == nested_class_.c[rc] for lc, rc in pairs])
+            stmt = stmt.join_from(class_, nested_class_, join_condition, isouter=isouter)
+            stmt = join_required_relations(
+                stmt, nested_class_, tree[k], get_nested_property_map(k, property_map), condition_group, isouter
+            )
+            continue
         rel_prop = sa.inspect(class_).mapper.relationships[fieldname]
         # Build join condition dynamically
         nested_class_ = getattr(class_, fieldname).mapper.class_
@@ -62,21 +187,69 @@ def join_required_relations(
             getattr(class_, lc.name) == getattr(nested_class_, rc.name)
             for lc, rc in rel_prop.local_remote_pairs
         ]
-        stmt = stmt.join_from(class_, nested_class_, join_condition[0])
-        stmt = join_required_relations(stmt, nested_class_, tree[k], property_map, condition_group)
+        stmt = stmt.join_from(class_, nested_class_, join_condition[0], isouter=isouter)
+        stmt = join_required_relations(
+            stmt, nested_class_, tree[k], get_nested_property_map(k, property_map), condition_group, isouter
+        )
     return stmt    
 
 def build_query(
-    class_: type,
+    class_: type|FromClause,
     filters: List['FilterSchema'],
-    property_map: Union[dict, None] = None,
+    property_map: Union[dict, ResolutionTable, None] = None,
     order_by: Union[str, List[str], None] = None,
-    is_desc: Union[bool, List[bool]] = False
+    is_desc: Union[bool, List[bool]] = False,
+    limit: Union[int, None] = None,
+    cost_policy: Union[CostPolicy, None] = None,
+    after: Union[tuple, None] = None,
+    watermark_column: Union[str, None] = None,
+    since: Union[str, None] = None,
+    nulls_largest: bool = False
 ):
+    query, _ = plan_query(
+        class_, filters, property_map, order_by, is_desc, limit=limit, cost_policy=cost_policy, after=after,
+        watermark_column=watermark_column, since=since, nulls_largest=nulls_largest
+    )
+    return query
+
+def plan_query(
+    class_: type|FromClause,
+    filters: List['FilterSchema'],
+    property_map: Union[dict, ResolutionTable, None] = None,
+    order_by: Union[str, List[str], None] = None,
+    is_desc: Union[bool, List[bool]] = False,
+    limit: Union[int, None] = None,
+    cost_policy: Union[CostPolicy, None] = None,
+    after: Union[tuple, None] = None,
+    watermark_column: Union[str, None] = None,
+    since: Union[str, None] = None,
+    nulls_largest: bool = False
+)->tuple[Select, list[tuple[Any, bool]]]:
+    """Build the query of build_query, also returning the resolved
+    (expression, is_desc) pairs it is ordered by.
+
+    nulls_largest tells the keyset cursor after where the database sorts
+    NULLs, see NULLS_LARGEST_DIALECTS."""
     _filters = deserialize_filters(filters)
-    query = sa.select(class_)
-    
+    if isinstance(order_by, str):
+        order_by = [field.split('.') for field in order_by.split(',')]
+    order_paths = [fields for fields in order_by or [] if isinstance(fields, list)]
+    if isinstance(property_map, ResolutionTable):
+        # Reject unknown fields and disallowed operators before any SQL is built
+        property_map.validate(_filters)
+        for fields in order_paths:
+            property_map.resolve_path(fields, allow_collections=False)
+    else:
+        # Ordering through a to-many relation repeats rows, breaking limit and cursors
+        for fields in order_paths:
+            check_to_one_path(class_, fields, property_map)
+
     grouped = group_filters_by_condition_group(_filters)
+    if cost_policy is not None:
+        cost_policy.check(grouped, order_paths, lambda fields: get_join_path(class_, fields, property_map))
+        limit = cost_policy.apply_limit(limit)
+
+    query = sa.select(class_)
     tree_condition_grouped = {}
     for condition_group, group in grouped.items():
         tree = convert_to_tree(group)
@@ -86,23 +259,62 @@ def build_query(
     for f in _filters:
         tree = tree_condition_grouped[f.condition_group]
         attrib = get_attrib_from_tree(tree, f.fields)
+        if isinstance(attrib, JSONPath):
+            attrib = attrib.expression(f.value)
         query = f.apply(query, attrib)
 
-    if isinstance(order_by, str):
-        order_by = order_by.split(',')
+    if order_paths:
+        # Ordering gets its own outer joins so it never drops rows from the result
+        tree = convert_to_tree([], order_paths)
+        query = join_required_relations(query, class_, tree, property_map, ORDER_BY_GROUP, isouter=True)
         order_by = [
-            getattr(class_, property_map[field] if property_map and field in property_map else field)
-            for field in order_by
+            get_attrib_from_tree(tree, fields) if isinstance(fields, list) else fields
+            for fields in order_by
         ]
+        order_by = [field.order_expression() if isinstance(field, JSONPath) else field for field in order_by]
 
     if isinstance(is_desc, bool):
         is_desc = [is_desc] * (len(order_by) if order_by else 0)
 
+    order_clauses = []
     if order_by:
         if len(order_by) != len(is_desc):
             raise ValueError("order_by and is_desc must have the same length.")
         
         for field, desc_flag in zip(order_by, is_desc):
             query = query.order_by(sa.desc(field) if desc_flag else field)
+            order_clauses.append((field, desc_flag))
+
+    if after is not None:
+        query = query.where(keyset_condition(order_clauses, after, nulls_largest))
+
+    if since is not None:
+        if watermark_column is None:
+            raise ValueError("since requires a watermark_column.")
+        # Only rows changed after the watermark token of the previous poll
+        watermark = get_column(class_, get_internal_db_field(watermark_column, property_map))
+        previous = decode_watermark(since).rows
+        if previous is not None:
+            query = query.where(watermark > previous)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query, order_clauses
+
+def keyset_condition(order_clauses:list[tuple[Any, bool]], after:tuple, nulls_largest:bool=False)->Any:
+    """Condition selecting the rows that sort after the row with order values after."""
+    if len(after) != len(order_clauses):
+        raise ValueError("after must have one value per order_by field.")
+    conditions = []
+    for i, ((field, desc_flag), value) in enumerate(zip(order_clauses, after)):
+        ties = [f.is_(None) if v is None else f == v for (f, _), v in zip(order_clauses[:i], after[:i])]
+        conditions.append(sa.and_(*ties, _sorts_after(field, desc_flag, value, nulls_largest)))
+    return sa.or_(*conditions)
 
-    return query
\ No newline at end of file
+def _sorts_after(field:Any, desc_flag:bool, value:Any, nulls_largest:bool)->Any:
+    nulls_first = nulls_largest == desc_flag
+    if value is None:
+        return field.is_not(None) if nulls_first else sa.false()
+    after = field < value if desc_flag else field > value
+    return after if nulls_first else sa.or_(after, field.is_(None))
@@ -0,0 +1,123 @@
+from typing import TYPE_CHECKING, Any, List, Union
+import sqlalchemy as sa
+from sqlalchemy import orm
+from sqlalchemy.sql.expression import Join
+
+from json_to_sql import build_query, get_internal_db_field, get_primary_key, is_core
+from json_to_sql.registry import ResolutionTable
+
+if TYPE_CHECKING:
+    from json_to_sql.schemas import FilterSchema
+
+IN = 'in'
+EXISTS = 'exists'
+STRATEGIES = (IN, EXISTS)
+
+# MySQL refuses a subquery on the table being changed unless it is materialized first
+MATERIALIZE_DIALECTS = ('mysql', 'mariadb')
+
+def default_strategy(dialect:Union[str, None])->str:
+    return EXISTS if dialect == 'postgresql' else IN
+
+def _where(
+    class_:Any,
+    filters:List['FilterSchema'],
+    property_map:Union[dict, ResolutionTable, None],
+    strategy:Union[str, None],
+    dialect:Union[str, None],
+    allow_all:bool
+)->Any:
+    if not filters and not allow_all:
+        # An empty filter list, e.g. a request body of [], must not change the whole table
+        raise ValueError("No filters given, pass allow_all=True to change every row.", None)
+    query = build_query(class_, filters, property_map)
+    if not any(isinstance(f, Join) for f in query.get_final_froms()):
+        return query.whereclause #Plain filters on the root table
+
+    strategy = strategy or default_strategy(dialect)
+    if strategy not in STRATEGIES:
+        raise ValueError(f"strategy must be one of {STRATEGIES}", None)
+    pk = get_primary_key(class_)
+    if strategy == EXISTS:
+        # Plan the joins on an alias of the root and correlate it to the changed table
+        alias = class_.alias() if is_core(class_) else orm.aliased(class_)
+        inner = build_query(alias, filters, property_map)
+        matches = [a == b for a, b in zip(get_primary_key(alias), pk)]
+        return inner.with_only_columns(sa.literal(1)).where(*matches).exists()
+
+    matching = query.with_only_columns(*pk).correlate(None)
+    if dialect in MATERIALIZE_DIALECTS:
+        derived = matching.subquery()
+        matching = sa.select(*derived.c)
+    key = pk[0] if len(pk) == 1 else sa.tuple_(*pk)
+    return key.in_(matching)
+
+def build_update(
+    class_: Any,
+    filters: List['FilterSchema'],
+    values: dict,
+    property_map: Union[dict, ResolutionTable, None] = None,
+    strategy: Union[str, None] = None,
+    dialect: Union[str, None] = None,
+    allow_all: bool = False
+)->sa.sql.Update:
+    """Set based UPDATE of every row build_query would select.
+
+    Filters that need joins become WHERE pk IN (subquery) or a correlated
+    EXISTS, chosen by dialect unless strategy is given. The keys of values
+    are resolved through property_map like filter fields. Without filters
+    a ValueError is raised unless allow_all is set.
+    """
+    where = _where(class_, filters, property_map, strategy, dialect, allow_all)
+    values = {get_internal_db_field(k, property_map): v for k, v in values.items()}
+    stmt = sa.update(class_).values(values)
+    return stmt if where is None else stmt.where(where)
+
+def build_delete(
+    class_: Any,
+    filters: List['FilterSchema'],
+    property_map: Union[dict, ResolutionTable, None] = None,
+    strategy: Union[str, None] = None,
+    dialect: Union[str, None] = None,
+    allow_all: bool = False
+)->sa.sql.Delete:
+    """Set based DELETE of every row build_query would select, see build_update."""
+    where = _where(class_, filters, property_map, strategy, dialect, allow_all)
+    stmt = sa.delete(class_)
+    return stmt if where is None else stmt.where(where)
+
+def bulk_update(
+    session: orm.Session,
+    class_: Any,
+    filters: List['FilterSchema'],
+    values: dict,
+    property_map: Union[dict, ResolutionTable, None] = None,
+    synchronize_session: Union[str, bool] = 'fetch',
+    strategy: Union[str, None] = None,
+    allow_all: bool = False
+)->int:
+    """Execute build_update in one statement and return the number of affected rows.
+
+    synchronize_session is passed on to the ORM: 'fetch' (the default) works
+    for every filter, 'evaluate' only for filters without joins, False skips
+    updating objects already loaded in the session.
+    """
+    dialect = session.get_bind().dialect.name
+    stmt = build_update(class_, filters, values, property_map, strategy, dialect, allow_all)
+    result = session.execute(stmt, execution_options={'synchronize_session': synchronize_session})
+    return result.rowcount
+
+def bulk_delete(
+    session: orm.Session,
+    class_: Any,
+    filters: List['FilterSchema'],
+    property_map: Union[dict, ResolutionTable, None] = None,
+    synchronize_session: Union[str, bool] = 'fetch',
+    strategy: Union[str, None] = None,
+    allow_all: bool = False
+)->int:
+    """Execute build_delete in one statement and return the number of affected rows."""
+    dialect = session.get_bind().dialect.name
+    stmt = build_delete(class_, filters, property_map, strategy, dialect, allow_all)
+    result = session.execute(stmt, execution_options={'synchronize_session': synchronize_session})
+    return result.rowcount
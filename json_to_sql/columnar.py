@@ -0,0 +1,107 @@
+from typing import TYPE_CHECKING, Any, List, Union
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+from json_to_sql import plan_query, get_internal_db_field, get_column, is_core
+from json_to_sql.registry import ResolutionTable
+
+try:
+    import numpy as np
+except ImportError: #Optional dependency, see extras_require
+    np = None
+
+if TYPE_CHECKING:
+    from json_to_sql.schemas import FilterSchema
+
+DEFAULT_BATCH_SIZE = 65536
+
+def numpy_dtype(type_:sa.types.TypeEngine)->Any:
+    if isinstance(type_, sa.Boolean):
+        return np.dtype(bool)
+    if isinstance(type_, sa.Integer):
+        return np.dtype(np.int64)
+    if isinstance(type_, sa.Numeric):
+        return np.dtype(np.float64)
+    if isinstance(type_, sa.DateTime):
+        return np.dtype('datetime64[us]')
+    if isinstance(type_, sa.Date):
+        return np.dtype('datetime64[D]')
+    return np.dtype(object)
+
+def _fill_value(dtype:Any)->Any:
+    if dtype.kind == 'f':
+        return np.nan
+    if dtype.kind in ('i', 'b'):
+        return 0
+    return None #NaT for datetime64, None for object columns
+
+def execute_columnar(
+    session: orm.Session,
+    class_: type,
+    filters: List['FilterSchema'],
+    property_map: Union[dict, ResolutionTable, None] = None,
+    order_by: Union[str, List[str], None] = None,
+    is_desc: Union[bool, List[bool]] = False,
+    columns: Union[List[str], None] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    **kwargs
+)->dict[str, Any]:
+    """Run a build_query search and return its rows as NumPy arrays, one per column.
+
+    The entity select is rewritten into a select of the requested columns
+    (all mapped columns, or all columns of a Core table, by default) with the same joins and filters, so no
+    ORM objects are created. Rows are fetched in batches of batch_size into
+    preallocated typed arrays. Every array is a numpy.ma.MaskedArray that
+    masks the NULLs.
+    """
+    if np is None:
+        raise ImportError("execute_columnar requires numpy, install json_to_sql[columnar]")
+    if columns is None and is_core(class_):
+        columns = [column.key for column in class_.c]
+        attributes = list(class_.c)
+    elif columns is None:
+        # Mapper keys, they are not names of the API schema a property_map translates
+        columns = [prop.key for prop in sa.inspect(class_).mapper.column_attrs]
+        attributes = [getattr(class_, name) for name in columns]
+    else:
+        attributes = [get_column(class_, get_internal_db_field(name, property_map)) for name in columns]
+    dtypes = [numpy_dtype(attrib.type) for attrib in attributes]
+
+    query, _ = plan_query(class_, filters, property_map, order_by, is_desc, **kwargs)
+    query = query.with_only_columns(*attributes)
+
+    # Sized as the rows arrive, counting first would run the query twice
+    data = [np.empty(batch_size, dtype=dtype) for dtype in dtypes]
+    masks = [np.zeros(batch_size, dtype=bool) for _ in dtypes]
+
+    # Executed on the Connection, bypassing the ORM result processing entirely
+    result = session.connection().execute(query.execution_options(stream_results=True))
+    position = 0
+    while True:
+        rows = result.fetchmany(batch_size)
+        if not rows:
+            break
+        end = position + len(rows)
+        if end > len(data[0]):
+            size = max(end, 2 * len(data[0]))
+            data = [np.resize(array, size) for array in data]
+            masks = [np.resize(mask, size) for mask in masks]
+        for i, values in enumerate(zip(*rows)):
+            mask = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+            if mask.any():
+                fill = _fill_value(dtypes[i])
+                values = [fill if v is None else v for v in values]
+            if dtypes[i].kind == 'O':
+                # asarray would turn equal length lists, e.g. JSON arrays, into a 2-D array
+                column = np.empty(len(values), dtype=object)
+                column[:] = values
+            else:
+                column = np.asarray(values, dtype=dtypes[i])
+            data[i][position:end] = column
+            masks[i][position:end] = mask
+        position = end
+
+    return {
+        name: np.ma.MaskedArray(array[:position], mask=mask[:position])
+        for name, array, mask in zip(columns, data, masks)
+    }
@@ -0,0 +1,158 @@
+import time
+from typing import TYPE_CHECKING, Callable, Union
+from sqlalchemy import exc, orm
+from sqlalchemy.engine import Connection, Result
+
+from json_to_sql.filters.filters import InFilter, LikeFilter
+
+if TYPE_CHECKING:
+    from sqlalchemy.sql.expression import Executable
+    from json_to_sql.filters.filters import Filter
+
+SQLITE_PROGRESS_STEPS = 1000 #Number of VM instructions between deadline checks
+POSTGRES_QUERY_CANCELED = '57014'
+TIMEOUT_DIALECTS = ('sqlite', 'postgresql')
+
+class QueryCostError(ValueError):
+    """Raised when a query exceeds one of the limits of a CostPolicy."""
+
+    def __init__(self, limit:str, value:int, maximum:int):
+        self.limit = limit
+        self.value = value
+        self.maximum = maximum
+        super().__init__(f"Query exceeds {limit}: {value} > {maximum}")
+
+class QueryTimeoutError(TimeoutError):
+    """Raised when a statement is cancelled by execute_with_timeout."""
+
+class CostPolicy:
+    """Limits checked by build_query before any SQL is built.
+
+    Every limit is optional. When max_limit is set every query gets a LIMIT:
+    queries without one are capped at max_limit, larger ones are rejected.
+    """
+
+    def __init__(
+        self,
+        max_join_depth:Union[int, None]=None,
+        max_aliases:Union[int, None]=None,
+        max_in_values:Union[int, None]=None,
+        max_filters_per_group:Union[int, None]=None,
+        allow_leading_wildcard:bool=True,
+        max_limit:Union[int, None]=None
+    ):
+        self.max_join_depth = max_join_depth
+        self.max_aliases = max_aliases
+        self.max_in_values = max_in_values
+        self.max_filters_per_group = max_filters_per_group
+        self.allow_leading_wildcard = allow_leading_wildcard
+        self.max_limit = max_limit
+
+    def __repr__(self)->str:
+        return f"<CostPolicy(max_join_depth={self.max_join_depth}, max_aliases={self.max_aliases}" \
+               f", max_in_values={self.max_in_values}, max_filters_per_group={self.max_filters_per_group}" \
+               f", allow_leading_wildcard={self.allow_leading_wildcard}, max_limit={self.max_limit})>"
+
+    def check(
+        self,
+        grouped:dict[str, list['Filter']],
+        order_paths:list[list[str]]=(),
+        join_path:Union[Callable[[list[str]], tuple], None]=None
+    )->None:
+        """join_path maps a field path onto the part of it that is joined,
+        so paths continuing inside a JSON column do not count as joins."""
+        paths_per_group = [[f.fields for f in group] for group in grouped.values()]
+        if order_paths:
+            paths_per_group.append(order_paths) #Ordering is joined separately
+        if join_path is not None:
+            paths_per_group = [[join_path(fields) for fields in paths] for paths in paths_per_group]
+        all_paths = [fields for paths in paths_per_group for fields in paths]
+
+        join_depth = max((len(fields) - 1 for fields in all_paths), default=0)
+        self._check('max_join_depth', join_depth, self.max_join_depth)
+
+        # Every distinct relation prefix within a group is joined as its own alias
+        aliases = sum(
+            len({tuple(fields[:i]) for fields in paths for i in range(1, len(fields))})
+            for paths in paths_per_group
+        )
+        self._check('max_aliases', aliases, self.max_aliases)
+
+        filters = [f for group in grouped.values() for f in group]
+        in_values = sum(len(f.value) for f in filters if isinstance(f, InFilter))
+        self._check('max_in_values', in_values, self.max_in_values)
+
+        filters_per_group = max((len(group) for group in grouped.values()), default=0)
+        self._check('max_filters_per_group', filters_per_group, self.max_filters_per_group)
+
+        if not self.allow_leading_wildcard:
+            for f in filters:
+                if isinstance(f, LikeFilter) and f.value[:1] in ('%', '_'):
+                    raise QueryCostError('allow_leading_wildcard', 1, 0)
+
+    def apply_limit(self, limit:Union[int, None])->Union[int, None]:
+        if self.max_limit is None:
+            return limit
+        if limit is None:
+            return self.max_limit
+        self._check('max_limit', limit, self.max_limit)
+        return limit
+
+    def _check(self, name:str, value:int, maximum:Union[int, None])->None:
+        if maximum is not None and value > maximum:
+            raise QueryCostError(name, value, maximum)
+
+def execute_with_timeout(
+    session:Union[orm.Session, Connection],
+    stmt:'Executable',
+    timeout:float
+)->Result:
+    """Execute stmt and fetch all rows, cancelling the statement after timeout seconds.
+
+    SQLite uses a progress handler, PostgreSQL a transaction scoped
+    statement_timeout. The returned result is fully buffered, so the timeout
+    also covers fetching the rows.
+    """
+    conn = session.connection() if isinstance(session, orm.Session) else session
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        return _execute_sqlite(session, conn, stmt, timeout)
+    if dialect == 'postgresql':
+        return _execute_postgresql(session, conn, stmt, timeout)
+    raise ValueError(
+        f"Statement timeouts are not supported for dialect {dialect}, only for {', '.join(TIMEOUT_DIALECTS)}", None
+    )
+
+def _execute_sqlite(session, conn:Connection, stmt:'Executable', timeout:float)->Result:
+    dbapi_connection = conn.connection.dbapi_connection
+    deadline = time.monotonic() + timeout
+    dbapi_connection.set_progress_handler(lambda: int(time.monotonic() > deadline), SQLITE_PROGRESS_STEPS)
+    try:
+        return session.execute(stmt).freeze()()
+    except exc.OperationalError as e:
+        if time.monotonic() > deadline:
+            raise QueryTimeoutError(f"Statement cancelled after {timeout} seconds") from e
+        raise
+    finally:
+        dbapi_connection.set_progress_handler(None, SQLITE_PROGRESS_STEPS)
+
+def _execute_postgresql(session, conn:Connection, stmt:'Executable', timeout:float)->Result:
+    # Clamped, a statement_timeout of 0 would disable the timeout altogether
+    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(timeout * 1000))}")
+    failed = True
+    try:
+        result = session.execute(stmt).freeze()()
+        failed = False
+    except exc.OperationalError as e:
+        code = getattr(e.orig, 'pgcode', None) or getattr(e.orig, 'sqlstate', None)
+        if code == POSTGRES_QUERY_CANCELED:
+            raise QueryTimeoutError(f"Statement cancelled after {timeout} seconds") from e
+        raise
+    finally:
+        try:
+            conn.exec_driver_sql("SET LOCAL statement_timeout = DEFAULT")
+        except exc.DBAPIError:
+            if not failed:
+                raise
+            # The failed statement aborted the transaction, its rollback resets the timeout
+    return result
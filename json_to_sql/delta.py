@@ -0,0 +1,83 @@
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Union
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+from json_to_sql import build_query, get_column, get_internal_db_field, get_primary_key, is_core
+from json_to_sql.registry import ResolutionTable
+from json_to_sql.watermarks import Watermark, decode_watermark, encode_watermark
+
+if TYPE_CHECKING:
+    from json_to_sql.schemas import FilterSchema
+
+class ChangeSet(NamedTuple):
+    rows: list #Rows of the filtered set that changed since the previous watermark
+    removed: list #Primary keys of rows that were deleted or left the filtered set
+    watermark: str #Token to pass as since on the next poll
+
+def fetch_changes(
+    session: orm.Session,
+    class_: Any,
+    filters: List['FilterSchema'],
+    watermark_column: str,
+    since: Union[str, None] = None,
+    property_map: Union[dict, ResolutionTable, None] = None,
+    tombstones: Union[sa.Table, None] = None,
+    tombstone_key: str = 'id',
+    tombstone_column: Union[str, None] = None,
+    **kwargs
+)->ChangeSet:
+    """Poll the filtered set for changes since the watermark token since.
+
+    watermark_column must be a monotonically increasing version or
+    updated_at column of class_. Without since every matching row is
+    returned. Deletions are read from the optional tombstones table, whose
+    tombstone_key column holds the deleted primary key and whose
+    tombstone_column (by default named like the watermark column) holds
+    its own watermark. Rows that changed but no longer match the filters
+    are reported as removed as well.
+
+    The watermark covers every change, so the rows cannot be limited or
+    paged: the rows cut off would never be returned.
+    """
+    cost_policy = kwargs.get('cost_policy')
+    if kwargs.get('limit') is not None or kwargs.get('after') is not None \
+            or getattr(cost_policy, 'max_limit', None) is not None:
+        raise ValueError("fetch_changes returns every change since the watermark, it cannot be limited or paged.")
+    previous = decode_watermark(since) if since is not None else Watermark(None)
+    watermark = get_column(class_, get_internal_db_field(watermark_column, property_map))
+    pk = get_primary_key(class_)
+
+    def changed(stmt:Any, column:Any, value:Any)->Any:
+        return stmt if value is None else stmt.where(column > value)
+
+    # Read the new watermarks first, rows committed meanwhile are returned again next poll
+    rows_watermark = session.execute(changed(sa.select(sa.func.max(watermark)), watermark, previous.rows)).scalar()
+    tombstones_watermark = None
+    if tombstones is not None:
+        version = tombstones.c[tombstone_column or watermark.key]
+        tombstones_watermark = session.execute(
+            changed(sa.select(sa.func.max(version)), version, previous.tombstones)
+        ).scalar()
+
+    stmt = build_query(class_, filters, property_map, watermark_column=watermark_column, since=since, **kwargs)
+    if is_core(class_):
+        rows = session.execute(stmt).all()
+    else:
+        rows = session.execute(stmt).scalars().unique().all()
+
+    removed = []
+    if previous.rows is not None:
+        matching = build_query(class_, filters, property_map).with_only_columns(*pk)
+        key = pk[0] if len(pk) == 1 else sa.tuple_(*pk)
+        left = sa.select(*pk).where(watermark > previous.rows, key.not_in(matching))
+        removed.extend(session.execute(left).all())
+    if tombstones is not None and since is not None: #A first poll has nothing to remove
+        deleted = changed(sa.select(tombstones.c[tombstone_key]), version, previous.tombstones)
+        removed.extend(session.execute(deleted).all())
+    removed = [row[0] if len(row) == 1 else tuple(row) for row in removed]
+
+    new_watermark = Watermark(
+        previous.rows if rows_watermark is None else rows_watermark,
+        previous.tombstones if tombstones_watermark is None else tombstones_watermark
+    )
+    return ChangeSet(rows, removed, encode_watermark(new_watermark))
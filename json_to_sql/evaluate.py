@@ -0,0 +1,124 @@
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Union
+from pydantic import BaseModel
+
+from json_to_sql import get_internal_db_field, get_nested_property_map, group_filters_by_condition_group
+from json_to_sql.json_paths import json_value_for
+from json_to_sql.ordering import SortKey
+from json_to_sql.registry import ResolutionTable
+from json_to_sql.schemas import deserialize_filters
+
+if TYPE_CHECKING:
+    from json_to_sql.filters.filters import Filter
+    from json_to_sql.schemas import FilterSchema
+
+COLLECTION_TYPES = (list, tuple, set, frozenset)
+
+def _model_field(model:type, field:str)->str:
+    for name, info in model.model_fields.items():
+        if field == name or field == info.alias:
+            return name
+    raise AttributeError(f"{model.__name__} has no field {field}")
+
+def _get(obj:Any, field:str, property_map:Union[dict, ResolutionTable, None])->Any:
+    if isinstance(obj, dict): #Inside a JSON document keys are used as given
+        return obj.get(field)
+    if isinstance(obj, BaseModel): #pydantic objects carry the API names themselves
+        return getattr(obj, _model_field(type(obj), field))
+    return getattr(obj, get_internal_db_field(field, property_map))
+
+def _nested_map(obj:Any, field:str, property_map:Union[dict, ResolutionTable, None])->Any:
+    if isinstance(obj, (dict, BaseModel)):
+        return None
+    return get_nested_property_map(field, property_map)
+
+def _matches(
+    obj:Any,
+    filters:list['Filter'],
+    depth:int,
+    property_map:Union[dict, ResolutionTable, None],
+    dialect:Union[str, None]
+)->bool:
+    nested = defaultdict(list)
+    for f in filters:
+        if len(f.fields) == depth + 1:
+            candidate = _get(obj, f.fields[depth], property_map)
+            if isinstance(obj, dict):
+                candidate = json_value_for(candidate, f.value) #Cast like the SQL does
+            if not f.matches(candidate, dialect):
+                return False
+        else:
+            nested[f.fields[depth]].append(f)
+    for field, group in nested.items():
+        child = _get(obj, field, property_map)
+        child_map = _nested_map(obj, field, property_map)
+        # Filters of one condition group share a join, so one element must match all of them
+        children = child if isinstance(child, COLLECTION_TYPES) else [] if child is None else [child]
+        if not any(_matches(c, group, depth + 1, child_map, dialect) for c in children):
+            return False
+    return True
+
+def compile_predicate(
+    filters:List['FilterSchema'],
+    property_map:Union[dict, ResolutionTable, None]=None,
+    dialect:Union[str, None]=None
+)->Callable[[Any], bool]:
+    """Python counterpart of the WHERE clause build_query generates.
+
+    Works on ORM objects, pydantic models or anything else with attributes
+    and follows the same dotted paths and property_map. A path through a
+    collection matches when any element does, with all filters of a
+    condition group evaluated against the same element, like the joins of
+    build_query. pydantic objects are read by their API field names, so
+    the property_map only applies to other objects. Give the dialect name
+    to follow its rules where databases differ, see TEXT_DATE_DIALECTS and
+    CASE_INSENSITIVE_LIKE_DIALECTS.
+    """
+    _filters = deserialize_filters(filters)
+    if isinstance(property_map, ResolutionTable):
+        property_map.validate(_filters)
+    groups = list(group_filters_by_condition_group(_filters).values())
+
+    def predicate(obj:Any)->bool:
+        return all(_matches(obj, group, 0, property_map, dialect) for group in groups)
+    return predicate
+
+def filter_objects(
+    objects:Iterable[Any],
+    filters:List['FilterSchema'],
+    property_map:Union[dict, ResolutionTable, None]=None,
+    dialect:Union[str, None]=None
+)->list:
+    predicate = compile_predicate(filters, property_map, dialect)
+    return [obj for obj in objects if predicate(obj)]
+
+def _order_value(obj:Any, fields:list[str], property_map:Union[dict, ResolutionTable, None])->Any:
+    for field in fields:
+        if obj is None:
+            return None #Outer join semantics, a missing relation sorts as NULL
+        child_map = _nested_map(obj, field, property_map)
+        obj = _get(obj, field, property_map)
+        if isinstance(obj, COLLECTION_TYPES):
+            raise ValueError(f"Cannot order by {'.'.join(fields)} in memory, it passes through a collection", None)
+        property_map = child_map
+    return obj
+
+def sort_objects(
+    objects:Iterable[Any],
+    order_by:Union[str, List[str]],
+    is_desc:Union[bool, List[bool]]=False,
+    property_map:Union[dict, ResolutionTable, None]=None,
+    nulls_largest:bool=False
+)->list:
+    """Python counterpart of the order_by and is_desc arguments of build_query."""
+    if isinstance(order_by, str):
+        order_by = order_by.split(',')
+    paths = [field.split('.') for field in order_by]
+    if isinstance(is_desc, bool):
+        is_desc = [is_desc] * len(paths)
+    if len(paths) != len(is_desc):
+        raise ValueError("order_by and is_desc must have the same length.")
+    return sorted(
+        objects,
+        key=lambda obj: SortKey([_order_value(obj, p, property_map) for p in paths], is_desc, nulls_largest)
+    )
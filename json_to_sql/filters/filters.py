@@ -1,5 +1,9 @@
 import abc
 import datetime
+import functools
+import operator
+import re
+import sys
 import logging
 from sqlalchemy.sql.expression import Select
 from sqlalchemy import orm
@@ -24,27 +28,86 @@ def parse_date_strings(value:str)->Union[datetime.date, datetime.datetime, None]
     except:
         raise ValueError('Value is not a date or datetime')
 
+# Dialects storing dates as text, where a date sorts before every datetime on the same day
+TEXT_DATE_DIALECTS = ('sqlite',)
+# Dialects whose LIKE ignores the case of ASCII letters
+CASE_INSENSITIVE_LIKE_DIALECTS = ('sqlite',)
+TEXT_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S.%f' #How SQLAlchemy stores a DateTime on SQLite
+
+def coerce_pair(candidate:Any, value:Any, dialect:Union[str, None]=None)->tuple[Any, Any]:
+    """Make an attribute value comparable with a filter value the way the
+    database would, e.g. text against dates and dates against datetimes.
+
+    A date against a datetime compares as midnight of that day, or as the
+    stored text for the TEXT_DATE_DIALECTS.
+    """
+    if isinstance(candidate, str) and isinstance(value, datetime.date):
+        return candidate, value.isoformat() #Text, e.g. inside JSON, is compared with the ISO string
+    mixed = (isinstance(value, datetime.datetime) and type(candidate) is datetime.date) or \
+            (isinstance(candidate, datetime.datetime) and type(value) is datetime.date)
+    if mixed and dialect in TEXT_DATE_DIALECTS:
+        return _date_text(candidate), _date_text(value)
+    if isinstance(value, datetime.datetime) and type(candidate) is datetime.date:
+        candidate = datetime.datetime.combine(candidate, datetime.time())
+    elif isinstance(candidate, datetime.datetime) and type(value) is datetime.date:
+        value = datetime.datetime.combine(value, datetime.time())
+    return candidate, value
+
+def _date_text(value:Union[datetime.date, datetime.datetime])->str:
+    if isinstance(value, datetime.datetime):
+        return value.strftime(TEXT_DATETIME_FORMAT)
+    return value.isoformat()
+
+@functools.lru_cache(maxsize=256)
+def like_to_regex(pattern:str, ignore_case:bool=False)->re.Pattern:
+    parts = ('.*' if c == '%' else '.' if c == '_' else re.escape(c) for c in pattern)
+    flags = re.DOTALL | (re.IGNORECASE | re.ASCII if ignore_case else 0)
+    return re.compile(''.join(parts), flags)
+
     
     
 class Filter(abc.ABC):
+    """Immutable, hashable filter value.
+
+    Field paths are interned tuples and the values of an in filter are frozen,
+    so filters can be deduplicated and used as cache keys.
+    """
     OP = None
+    __slots__ = ('fields', 'value', 'condition_group')
 
     def __init__(self, filter_data:'FilterSchema')->'Filter':
-        self.nested = None
-        self.fields:list[str] = filter_data.field.split('.')
-        self.value = self._date_or_value(filter_data.value)
-        self.condition_group = filter_data.condition_group
+        _set = object.__setattr__
+        _set(self, 'fields', tuple(sys.intern(part) for part in filter_data.field.split('.')))
+        _set(self, 'value', self._date_or_value(filter_data.value))
+        _set(self, 'condition_group', sys.intern(filter_data.condition_group))
         self.is_valid()
 
+    def __setattr__(self, name:str, value:Any)->None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name:str)->None:
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __getstate__(self)->tuple:
+        return self.fields, self.value, self.condition_group
+
+    def __setstate__(self, state:tuple)->None:
+        # Used by pickle and copy, which would otherwise hit the immutable __setattr__
+        for name, value in zip(Filter.__slots__, state):
+            object.__setattr__(self, name, value)
+
     def __repr__(self)->str:
         return f"<{type(self).__name__}(field='{'.'.join(self.fields)}', op='{self.OP}'" \
                f", value={self.value})>"
 
     def __eq__(self, other)->bool:
-        return hash(self) == hash(other)
+        if type(self) is not type(other):
+            return NotImplemented
+        return (self.fields, self.value, self.condition_group) == \
+               (other.fields, other.value, other.condition_group)
 
     def __hash__(self)->int:
-        return hash((self.field, self.OP, self.value))
+        return hash((type(self), self.fields, self.value, self.condition_group))
 
     @abc.abstractmethod
     def apply(self, stmt:'Select', attrib:Column)->'Select':
@@ -54,6 +117,15 @@ class Filter(abc.ABC):
     def is_valid(self)->bool:
         raise NotImplementedError('is_valid is an abstract method')
 
+    def matches(self, candidate:Any, dialect:Union[str, None]=None)->bool:
+        """Evaluate the filter in Python against an attribute value, with SQL
+        NULL semantics and the comparison rules of dialect where they differ.
+
+        Not abstract so filters defined outside this package keep working,
+        they just cannot be evaluated in memory.
+        """
+        raise TypeError(f"{type(self).__name__} cannot be evaluated in memory, it does not implement matches")
+
     def _date_or_value(self, value:Any)->Any:
         if not isinstance(value, str):
             return value
@@ -63,6 +135,18 @@ class Filter(abc.ABC):
             return value #value is just some string 
 
 class RelativeComparator(Filter):
+    COMPARE = None
+    __slots__ = ()
+
+    def matches(self, candidate:Any, dialect:Union[str, None]=None)->bool:
+        if candidate is None:
+            return False
+        candidate, value = coerce_pair(candidate, self.value, dialect)
+        try:
+            return self.COMPARE(candidate, value)
+        except TypeError:
+            return False
+
     def is_valid(self)->bool:
         try:
             allowed = (int, float, datetime.date, datetime.datetime)
@@ -72,12 +156,16 @@ class RelativeComparator(Filter):
 
 class LTFilter(RelativeComparator):
     OP = "<"
+    COMPARE = operator.lt
+    __slots__ = ()
 
     def apply(self, stmt:'Select', attrib:Column)->'Select':
         stmt = stmt.where(attrib < self.value)
         return stmt
 class LTEFilter(RelativeComparator):
     OP = "<="
+    COMPARE = operator.le
+    __slots__ = ()
 
     def apply(self, stmt:'Select', attrib:Column)->'Select':
         stmt = stmt.where(attrib <= self.value)
@@ -85,6 +173,8 @@ class LTEFilter(RelativeComparator):
 
 class GTFilter(RelativeComparator):
     OP = ">"
+    COMPARE = operator.gt
+    __slots__ = ()
 
     def apply(self, stmt:'Select', attrib:Column)->'Select':
         stmt = stmt.where(attrib > self.value)
@@ -92,17 +182,26 @@ class GTFilter(RelativeComparator):
 
 class GTEFilter(RelativeComparator):
     OP = ">="
+    COMPARE = operator.ge
+    __slots__ = ()
 
     def apply(self, stmt:'Select', attrib:Column)->'Select':
         stmt = stmt.where(attrib >= self.value)
         return stmt
 class EqualsFilter(Filter):
     OP = "="
+    __slots__ = ()
 
     def apply(self, stmt:'Select', attrib:Column)->'Select':
         stmt = stmt.where(attrib == self.value)
         return stmt
 
+    def matches(self, candidate:Any, dialect:Union[str, None]=None)->bool:
+        if self.value is None or candidate is None:
+            return candidate is self.value
+        candidate, value = coerce_pair(candidate, self.value, dialect)
+        return candidate == value
+
     def is_valid(self)->bool:
         allowed = (str, int, datetime.date, bool, None.__class__)
         try:
@@ -112,9 +211,10 @@ class EqualsFilter(Filter):
 
 class InFilter(Filter):
     OP = "in"
+    __slots__ = ()
 
     def apply(self, stmt:'Select', attrib:Column)->'Select':
-        stmt = stmt.where(attrib.in_(list(self.value)))
+        stmt = stmt.where(attrib.in_(self._ordered_values()))
         return stmt
 
     def is_valid(self)->bool:
@@ -122,14 +222,46 @@ class InFilter(Filter):
             _ = (e for e in self.value)
         except TypeError:
             raise ValueError(f"{self} must be an iterable", None)
+        if not isinstance(self.value, frozenset):
+            raise ValueError(f"{self} requires a list of strings, numbers or dates", None)
+
+    def _date_or_value(self, value:Any)->Any:
+        if isinstance(value, str):
+            return super()._date_or_value(value)
+        if not hasattr(value, '__iter__'):
+            return value #Rejected by is_valid
+        # Equal members collapse like the database compares them, e.g. 1, 1.0 and True
+        try:
+            return frozenset(value)
+        except TypeError:
+            return tuple(value) #Unhashable members, rejected by is_valid
+
+    def matches(self, candidate:Any, dialect:Union[str, None]=None)->bool:
+        if candidate is None:
+            return False
+        return any(c == v for c, v in (coerce_pair(candidate, v, dialect) for v in self.value))
+
+    def _ordered_values(self)->list:
+        # Sorted so equal filters always compile to the same parameters
+        try:
+            return sorted(self.value)
+        except TypeError:
+            return list(self.value)
 
 class NotEqualsFilter(Filter):
     OP = "!="
+    __slots__ = ()
 
     def apply(self, stmt:'Select', attrib:Column)->'Select':
         stmt = stmt.where(attrib != self.value)
         return stmt
 
+    def matches(self, candidate:Any, dialect:Union[str, None]=None)->bool:
+        if self.value is None or candidate is None:
+            return candidate is not None and self.value is None
+        candidate, value = coerce_pair(candidate, self.value, dialect)
+        return candidate != value
+
     def is_valid(self)->bool:
         allowed = (str, int, datetime.date, None.__class__)
         try:
@@ -140,11 +272,18 @@ class NotEqualsFilter(Filter):
 
 class LikeFilter(Filter):
     OP = "like"
+    __slots__ = ()
 
     def apply(self, stmt:'Select', attrib:Column)->'Select':
         stmt = stmt.where(attrib.like(self.value))
         return stmt
 
+    def matches(self, candidate:Any, dialect:Union[str, None]=None)->bool:
+        if candidate is None:
+            return False
+        regex = like_to_regex(self.value, dialect in CASE_INSENSITIVE_LIKE_DIALECTS)
+        return regex.fullmatch(str(candidate)) is not None
+
     def is_valid(self)->bool:
         try:
             assert isinstance(self.value, str)
@@ -0,0 +1,191 @@
+import datetime
+import re
+from collections import Counter
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Union
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm.attributes import QueryableAttribute
+from sqlalchemy.sql.expression import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+if TYPE_CHECKING:
+    from json_to_sql.registry import ResolutionTable
+    from json_to_sql.schemas import FilterSchema
+
+# Keys are rendered as literals so expression indexes match, hence the strict pattern
+KEY_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+class ISODateString(sa.types.TypeDecorator):
+    """Compares JSON text against dates by binding them as ISO strings."""
+    impl = sa.String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if isinstance(value, datetime.date):
+            return value.isoformat()
+        return value
+
+class JSONValue(sa.types.TypeDecorator):
+    """A value inside a JSON column that compares by its own type: jsonb on
+    PostgreSQL, the native value json_extract() returns elsewhere."""
+    impl = sa.types.NullType
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'postgresql':
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(sa.types.NullType())
+
+class JSONExtract(ColumnElement):
+    """A value inside a JSON column as text, or as a number or boolean on SQLite.
+
+    Compiles to json_extract() on SQLite and MySQL and to ->> / #>> on
+    PostgreSQL. With as_json the value keeps its JSON type, -> / #> cast to
+    jsonb on PostgreSQL, so numbers order as numbers.
+    """
+    inherit_cache = True
+    _traverse_internals = [
+        ('column', InternalTraversal.dp_clauseelement),
+        ('path', InternalTraversal.dp_string_list),
+        ('as_json', InternalTraversal.dp_boolean)
+    ]
+
+    def __init__(self, column:Any, path:tuple[str, ...], as_json:bool=False):
+        for key in path:
+            if not KEY_PATTERN.match(key):
+                raise ValueError(f"'{key}' is not a valid JSON path key", None)
+        self.column = column
+        self.path = tuple(path)
+        self.as_json = as_json
+        self.type = JSONValue() if as_json else sa.String()
+
+    @property
+    def _from_objects(self)->list:
+        return self.column._from_objects
+
+@compiles(JSONExtract)
+def _compile_json_extract(element:JSONExtract, compiler, **kw)->str:
+    path = '$' + ''.join(f'."{key}"' for key in element.path)
+    return f"JSON_EXTRACT({compiler.process(element.column, **kw)}, '{path}')"
+
+@compiles(JSONExtract, 'postgresql')
+def _compile_json_extract_postgresql(element:JSONExtract, compiler, **kw)->str:
+    column = compiler.process(element.column, **kw)
+    operator = '->' if element.as_json else '->>'
+    if len(element.path) == 1:
+        sql = f"({column} {operator} '{element.path[0]}')"
+    else:
+        sql = f"({column} #{operator[1:]} '{{{','.join(element.path)}}}')"
+    return f"CAST({sql} AS JSONB)" if element.as_json else sql
+
+def json_cast_for(value:Any)->Union[sa.types.TypeEngine, None]:
+    """The type a JSON value is cast to when compared with value, None for text."""
+    if isinstance(value, (frozenset, tuple, list)):
+        value = next(iter(value), None) #Values of an in filter
+    if isinstance(value, bool):
+        return sa.Boolean()
+    if isinstance(value, (int, float)):
+        return sa.Float()
+    if isinstance(value, datetime.date):
+        return ISODateString()
+    return None
+
+def json_value_for(candidate:Any, value:Any)->Any:
+    """Python counterpart of the cast json_cast_for applies before comparing
+    a JSON value with value, e.g. the string "10" against a number."""
+    if isinstance(json_cast_for(value), sa.Float) and candidate is not None:
+        try:
+            return float(candidate)
+        except (TypeError, ValueError):
+            return candidate
+    return candidate
+
+def json_path_expression(column:Any, path:tuple[str, ...], cast:Union[sa.types.TypeEngine, None]=None)->Any:
+    extract = JSONExtract(column, path)
+    if isinstance(cast, ISODateString):
+        return sa.type_coerce(extract, cast) #ISO strings compare like the dates themselves
+    if cast is not None:
+        return sa.cast(extract, cast)
+    return extract
+
+class JSONPath(NamedTuple):
+    """Placeholder in a join tree for a path inside a JSON column."""
+    column: Any
+    path: tuple
+
+    def expression(self, value:Any=None)->Any:
+        return json_path_expression(self.column, self.path, json_cast_for(value))
+
+    def order_expression(self)->Any:
+        # The ->> text of PostgreSQL would sort numbers as strings
+        return JSONExtract(self.column, self.path, as_json=True)
+
+def is_json_column(attrib:Any)->bool:
+    if isinstance(attrib, QueryableAttribute):
+        prop = attrib.property
+        return isinstance(prop, sa.orm.ColumnProperty) and isinstance(prop.columns[0].type, sa.JSON)
+    return isinstance(getattr(attrib, 'type', None), sa.JSON)
+
+def fill_json_tree(tree:dict, column:Any, prefix:tuple=())->None:
+    for k, v in tree.items():
+        if v is None:
+            tree[k] = JSONPath(column, prefix + (k,))
+        else:
+            fill_json_tree(v, column, prefix + (k,))
+
+def json_path_index(
+    column:Any,
+    path:tuple[str, ...],
+    cast:Union[sa.types.TypeEngine, None]=None,
+    name:Union[str, None]=None
+)->sa.Index:
+    """Expression index matching the SQL that filters on path with the given cast."""
+    if isinstance(column, QueryableAttribute):
+        column = column.property.columns[0]
+    if name is None:
+        kind = type(cast).__name__.lower() if cast is not None else 'text'
+        name = f"ix_{column.table.name}_{column.key}_{'_'.join(path)}_{kind}"
+    return sa.Index(name, json_path_expression(column, tuple(path), cast))
+
+class JSONPathUsage:
+    """Counts filters on JSON paths to suggest expression indexes for the
+    frequently filtered ones."""
+
+    def __init__(self):
+        self.counts:Counter = Counter()
+
+    def record(
+        self,
+        class_:Any,
+        filters:List['FilterSchema'],
+        property_map:Union[dict, 'ResolutionTable', None]=None
+    )->None:
+        # Imported here, json_to_sql itself builds on this module
+        from json_to_sql import get_json_path
+        from json_to_sql.schemas import deserialize_filters
+        for f in deserialize_filters(filters):
+            json_path = get_json_path(class_, f.fields, property_map)
+            if json_path is None:
+                continue
+            column = json_path.column
+            if isinstance(column, QueryableAttribute):
+                column = column.property.columns[0]
+            cast = json_cast_for(f.value)
+            self.counts[(column, json_path.path, type(cast) if cast is not None else None)] += 1
+
+    def suggest(self, min_count:int=1)->list[sa.Index]:
+        indexes = []
+        for (column, path, cast), count in self.counts.most_common():
+            if count < min_count:
+                continue
+            index = json_path_index(column, path, cast() if cast is not None else None)
+            column.table.indexes.discard(index) #A suggestion, not part of the metadata
+            indexes.append(index)
+        return indexes
+
+    def create_indexes(self, bind:Any, min_count:int=1)->list[sa.Index]:
+        indexes = self.suggest(min_count)
+        for index in indexes:
+            index.create(bind, checkfirst=True)
+        return indexes
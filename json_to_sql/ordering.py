@@ -0,0 +1,44 @@
+from typing import Any, Sequence
+
+# Dialects that sort NULL after every other value in ascending order
+NULLS_LARGEST_DIALECTS = ('postgresql', 'oracle')
+
+def compare(a:Any, b:Any, nulls_largest:bool=False)->int:
+    if a is None or b is None:
+        if a is b:
+            return 0
+        smaller = -1 if a is None else 1
+        return -smaller if nulls_largest else smaller
+    return (a > b) - (a < b)
+
+class SortKey:
+    """Python sort key matching SQL ORDER BY semantics.
+
+    Each value is sorted in its own direction and NULLs sort first in
+    ascending order, or last when nulls_largest is set (PostgreSQL, Oracle).
+    """
+    __slots__ = ('values', 'is_desc', 'nulls_largest')
+
+    def __init__(self, values:Sequence[Any], is_desc:Sequence[bool], nulls_largest:bool=False):
+        self.values = values
+        self.is_desc = is_desc
+        self.nulls_largest = nulls_largest
+
+    def __repr__(self)->str:
+        return f"<SortKey(values={tuple(self.values)}, is_desc={tuple(self.is_desc)})>"
+
+    def _compare(self, other:'SortKey')->int:
+        for a, b, desc_flag in zip(self.values, other.values, self.is_desc):
+            result = compare(a, b, self.nulls_largest)
+            if result:
+                return -result if desc_flag else result
+        return 0
+
+    def __lt__(self, other:'SortKey')->bool:
+        return self._compare(other) < 0
+
+    def __gt__(self, other:'SortKey')->bool:
+        return self._compare(other) > 0
+
+    def __eq__(self, other:'SortKey')->bool:
+        return self._compare(other) == 0
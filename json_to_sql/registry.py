@@ -0,0 +1,162 @@
+import typing
+from typing import TYPE_CHECKING, Any, NamedTuple, Union
+import sqlalchemy as sa
+from pydantic import BaseModel
+
+from json_to_sql.filters.filters import (
+    LTFilter,
+    LTEFilter,
+    EqualsFilter,
+    GTFilter,
+    GTEFilter,
+    InFilter,
+    NotEqualsFilter,
+    LikeFilter
+)
+
+if TYPE_CHECKING:
+    from json_to_sql.filters.filters import Filter
+
+EQUALITY_OPS = frozenset({EqualsFilter.OP, NotEqualsFilter.OP, InFilter.OP})
+ORDINAL_OPS = EQUALITY_OPS | {LTFilter.OP, LTEFilter.OP, GTFilter.OP, GTEFilter.OP}
+TEXT_OPS = EQUALITY_OPS | {LikeFilter.OP}
+JSON_PATH_OPS = ORDINAL_OPS | TEXT_OPS #Values inside a JSON column are cast per filter value
+
+ORDINAL_TYPES = (sa.Integer, sa.Numeric, sa.Date, sa.DateTime, sa.Time, sa.Interval)
+
+def allowed_ops(type_:sa.types.TypeEngine)->frozenset:
+    if isinstance(type_, sa.Boolean):
+        return EQUALITY_OPS
+    if isinstance(type_, ORDINAL_TYPES):
+        return ORDINAL_OPS
+    if isinstance(type_, sa.String):
+        return TEXT_OPS
+    return EQUALITY_OPS
+
+def _nested_model(annotation:Any)->Union[type, None]:
+    """Return the pydantic model wrapped in an annotation like List[ToySchema]
+    or Optional[AddressSchema], if any."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in typing.get_args(annotation):
+        model = _nested_model(arg)
+        if model is not None:
+            return model
+    return None
+
+class ResolvedField(NamedTuple):
+    name: str #Attribute name on the mapped class
+    ops: frozenset
+    nested: Union['ResolutionTable', None]
+    is_json: bool = False
+    is_collection: bool = False #A to-many relationship
+
+class ResolutionTable:
+    """Field-to-attribute lookup for one (schema, mapped class) pair.
+
+    Can be passed as the property_map of build_query, in which case every
+    nesting level is resolved against its own table.
+    """
+
+    def __init__(self, schema:type, class_:type):
+        self.schema = schema
+        self.class_ = class_
+        self.fields:dict[str, ResolvedField] = {}
+
+    def __repr__(self)->str:
+        return f"<ResolutionTable(schema={self.schema.__name__}, class_={self.class_.__name__})>"
+
+    def resolve(self, field:str)->ResolvedField:
+        try:
+            return self.fields[field]
+        except KeyError:
+            raise KeyError('Field {} is not defined on {}'.format(field, self.schema.__name__), None)
+
+    def resolve_path(self, fields:list[str], allow_collections:bool=True)->ResolvedField:
+        table = self
+        for field in fields[:-1]:
+            resolved = table.resolve(field)
+            if resolved.is_json:
+                return ResolvedField(resolved.name, JSON_PATH_OPS, None, True) #Path continues in the document
+            if resolved.nested is None:
+                raise KeyError('Field {} of {} is not a nested schema'.format(field, table.schema.__name__), None)
+            if resolved.is_collection and not allow_collections:
+                raise ValueError('Field {} of {} is a collection'.format(field, table.schema.__name__), None)
+            table = resolved.nested
+        resolved = table.resolve(fields[-1])
+        if resolved.nested is not None:
+            raise ValueError('Field {} of {} is a nested schema, not a column'.format(fields[-1], table.schema.__name__), None)
+        return resolved
+
+    def validate(self, filters:list['Filter'])->None:
+        for f in filters:
+            resolved = self.resolve_path(f.fields)
+            if f.OP not in resolved.ops:
+                raise ValueError(f"{f} is not allowed, allowed operators are {sorted(resolved.ops)}", None)
+
+class SchemaRegistry:
+    """Pairs pydantic API schemas with mapped classes.
+
+    Registration compiles a ResolutionTable for the schema and, recursively,
+    for every nested schema that maps onto a relationship. Register nested
+    schemas that need their own property_map before the schemas using them,
+    or register them afterwards: existing tables are recompiled in place.
+    """
+
+    def __init__(self):
+        self._tables:dict[tuple[type, type], ResolutionTable] = {}
+        self._by_schema:dict[type, ResolutionTable] = {}
+        self._property_maps:dict[type, dict] = {}
+
+    def register(self, schema:type, class_:type, property_map:Union[dict, None]=None)->ResolutionTable:
+        self._property_maps[schema] = dict(property_map or {})
+        table = self._compile(schema, class_, recompile=True)
+        self._by_schema[schema] = table
+        return table
+
+    def table_for(self, schema:type)->ResolutionTable:
+        try:
+            return self._by_schema[schema]
+        except KeyError:
+            raise KeyError('Schema {} is not registered'.format(schema.__name__), None)
+
+    def __getitem__(self, schema:type)->ResolutionTable:
+        return self.table_for(schema)
+
+    def __contains__(self, schema:type)->bool:
+        return schema in self._by_schema
+
+    def _compile(self, schema:type, class_:type, recompile:bool=False)->ResolutionTable:
+        key = (schema, class_)
+        table = self._tables.get(key)
+        if table is not None and not recompile:
+            return table
+        if table is None:
+            table = ResolutionTable(schema, class_)
+            self._tables[key] = table #Stored before recursing so cyclic schemas terminate
+        table.fields.clear()
+
+        property_map = self._property_maps.get(schema, {})
+        mapper = sa.inspect(class_).mapper
+        for name, info in schema.model_fields.items():
+            keys = [name] if not info.alias or info.alias == name else [name, info.alias]
+            mapped = [property_map[k] for k in keys if k in property_map]
+            attribute = mapped[0] if mapped else name
+            if attribute in mapper.relationships:
+                nested_schema = _nested_model(info.annotation)
+                if nested_schema is None:
+                    continue
+                relationship = mapper.relationships[attribute]
+                nested_table = self._compile(nested_schema, relationship.mapper.class_)
+                resolved = ResolvedField(attribute, frozenset(), nested_table, is_collection=relationship.uselist)
+            elif attribute in mapper.column_attrs:
+                column = mapper.column_attrs[attribute].columns[0]
+                resolved = ResolvedField(attribute, allowed_ops(column.type), None, isinstance(column.type, sa.JSON))
+            elif mapped:
+                raise KeyError('{} has no attribute {} (mapped from {}.{})'.format(
+                    class_.__name__, attribute, schema.__name__, name), None)
+            else:
+                continue #Not backed by the database, e.g. a computed field
+            for k in keys:
+                table.fields[k] = resolved
+        return table
@@ -0,0 +1,174 @@
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator, Sequence, Union
+import sqlalchemy as sa
+from sqlalchemy import exc, orm
+from sqlalchemy.engine import Connection, Engine, Result
+from sqlalchemy.pool import QueuePool
+
+if TYPE_CHECKING:
+    from sqlalchemy.sql.expression import Executable
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = 'round_robin'
+LEAST_LOADED = 'least_loaded'
+STRATEGIES = (ROUND_ROBIN, LEAST_LOADED)
+
+# Errors while connecting after which a replica is skipped and the read is retried elsewhere.
+# Once connected only lost connections fail over, statement errors such as bad SQL or
+# a cancelled statement would fail on every replica alike.
+CONNECT_ERRORS = (exc.DBAPIError, exc.DisconnectionError, exc.TimeoutError)
+
+def create_pooled_engine(
+    url:str,
+    pool_size:int=5,
+    max_overflow:int=0,
+    pool_timeout:float=30.0,
+    **kwargs
+)->Engine:
+    """Create an engine with a bounded QueuePool.
+
+    At most pool_size + max_overflow connections are opened, further
+    checkouts wait up to pool_timeout seconds.
+    """
+    if sa.engine.make_url(url).get_backend_name() == 'sqlite':
+        kwargs.setdefault('connect_args', {}).setdefault('check_same_thread', False)
+    return sa.create_engine(
+        url,
+        poolclass=QueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_pre_ping=True,
+        **kwargs
+    )
+
+class ReplicaRouter:
+    """Routes reads, e.g. statements from build_query, to read replicas.
+
+    Replicas are picked round robin or by the fewest checked out pool
+    connections. A replica that fails is skipped for retry_after seconds and
+    the read falls back to the next replica and finally to the primary.
+    Results are fully buffered and the session is closed afterwards, so ORM
+    objects are returned detached.
+    """
+
+    def __init__(
+        self,
+        primary:Engine,
+        replicas:Sequence[Engine]=(),
+        strategy:str=ROUND_ROBIN,
+        retry_after:float=30.0
+    ):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}", None)
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.retry_after = retry_after
+        self._counter = itertools.count()
+        self._down_until:dict[Engine, float] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_urls(
+        cls,
+        primary_url:str,
+        replica_urls:Sequence[str]=(),
+        strategy:str=ROUND_ROBIN,
+        retry_after:float=30.0,
+        **pool_kwargs
+    )->'ReplicaRouter':
+        primary = create_pooled_engine(primary_url, **pool_kwargs)
+        replicas = [create_pooled_engine(url, **pool_kwargs) for url in replica_urls]
+        return cls(primary, replicas, strategy=strategy, retry_after=retry_after)
+
+    def __repr__(self)->str:
+        return f"<ReplicaRouter(replicas={len(self.replicas)}, strategy='{self.strategy}')>"
+
+    def read(self, stmt:'Executable', use_primary:bool=False)->Result:
+        candidates = [self.primary] if use_primary else self._candidates()
+        for engine in candidates:
+            try:
+                connection = engine.connect()
+            except CONNECT_ERRORS:
+                if engine is self.primary:
+                    raise
+                self._mark_down(engine)
+                continue
+            with connection:
+                try:
+                    return self._execute(connection, stmt)
+                except (exc.DBAPIError, exc.DisconnectionError) as e:
+                    if engine is self.primary or not _is_disconnect(e):
+                        raise
+                    self._mark_down(engine)
+
+    @contextmanager
+    def write_session(self)->Iterator[orm.Session]:
+        """Session on the primary, committed when the block exits without error."""
+        with orm.Session(self.primary) as session, session.begin():
+            yield session
+
+    def session(self, read_your_writes:bool=False, pin_for:Union[float, None]=None)->'RoutedSession':
+        return RoutedSession(self, read_your_writes=read_your_writes, pin_for=pin_for)
+
+    def _candidates(self)->list[Engine]:
+        now = time.monotonic()
+        with self._lock:
+            healthy = [e for e in self.replicas if self._down_until.get(e, 0) <= now]
+            if healthy and self.strategy == ROUND_ROBIN:
+                start = next(self._counter) % len(healthy)
+                healthy = healthy[start:] + healthy[:start]
+        if self.strategy == LEAST_LOADED:
+            healthy.sort(key=_checked_out)
+        return healthy + [self.primary]
+
+    def _execute(self, connection:Connection, stmt:'Executable')->Result:
+        with orm.Session(connection) as session:
+            return session.execute(stmt).freeze()()
+
+    def _mark_down(self, engine:Engine)->None:
+        logger.warning("Replica %s failed, skipping it for %s seconds", engine.url, self.retry_after, exc_info=True)
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_after
+
+class RoutedSession:
+    """Reads through a ReplicaRouter with optional read-your-writes pinning.
+
+    With read_your_writes enabled, every read after a write on this session
+    goes to the primary, for pin_for seconds or, when pin_for is None, for
+    the lifetime of the session.
+    """
+
+    def __init__(self, router:ReplicaRouter, read_your_writes:bool=False, pin_for:Union[float, None]=None):
+        self.router = router
+        self.read_your_writes = read_your_writes
+        self.pin_for = pin_for
+        self._pinned_until = None
+
+    @property
+    def pinned(self)->bool:
+        return self._pinned_until is not None and time.monotonic() < self._pinned_until
+
+    def read(self, stmt:'Executable')->Result:
+        return self.router.read(stmt, use_primary=self.pinned)
+
+    @contextmanager
+    def write(self)->Iterator[orm.Session]:
+        with self.router.write_session() as session:
+            yield session
+        if self.read_your_writes:
+            self._pinned_until = math.inf if self.pin_for is None else time.monotonic() + self.pin_for
+
+def _is_disconnect(error:Exception)->bool:
+    return isinstance(error, exc.DisconnectionError) or getattr(error, 'connection_invalidated', False)
+
+def _checked_out(engine:Engine)->int:
+    checkedout = getattr(engine.pool, 'checkedout', None)
+    return checkedout() if checkedout else 0
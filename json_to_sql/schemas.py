@@ -24,4 +24,4 @@ def deserialize_filters(filters_data:List[FilterSchema])->'List[Filter]':
     for f in filters_data:
         Class = _get_filter_class(f.op)
         filters.append(Class(f))
-    return filters
\ No newline at end of file
+    return list(dict.fromkeys(filters)) #Drop duplicates, keep the order
\ No newline at end of file
@@ -0,0 +1,82 @@
+import heapq
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Sequence, Union
+from sqlalchemy import orm
+from sqlalchemy.engine import Engine
+
+from json_to_sql import plan_query
+from json_to_sql.ordering import NULLS_LARGEST_DIALECTS, SortKey
+
+if TYPE_CHECKING:
+    from json_to_sql.schemas import FilterSchema
+
+class ShardedPage(NamedTuple):
+    items: list
+    cursor: Union[tuple, None] #Pass as after to fetch the next page, None on the last page
+
+class ShardedExecutor:
+    """Runs the same build_query statement on every shard and merges the results.
+
+    Every shard returns at most limit rows, already filtered by the keyset
+    cursor, and the ordered streams are k-way merged on the resolved order
+    values. For stable pagination the order_by must be unique across all
+    shards, e.g. end with a globally unique key.
+    """
+
+    def __init__(self, engines:Sequence[Engine], max_workers:Union[int, None]=None):
+        if not engines:
+            raise ValueError("At least one shard is required.")
+        self.engines = list(engines)
+        self.max_workers = max_workers or len(self.engines)
+
+    def __repr__(self)->str:
+        return f"<ShardedExecutor(shards={len(self.engines)})>"
+
+    def query(
+        self,
+        class_: type,
+        filters: List['FilterSchema'],
+        property_map: Union[dict, None] = None,
+        order_by: Union[str, List[str], None] = None,
+        is_desc: Union[bool, List[bool]] = False,
+        limit: Union[int, None] = None,
+        after: Union[tuple, None] = None,
+        **kwargs
+    )->ShardedPage:
+        cost_policy = kwargs.get('cost_policy')
+        if cost_policy is not None:
+            limit = cost_policy.apply_limit(limit) #The merge needs the limit the shards got
+        nulls_largest = self.engines[0].dialect.name in NULLS_LARGEST_DIALECTS
+        query, order_clauses = plan_query(
+            class_, filters, property_map, order_by, is_desc, limit=limit, after=after,
+            nulls_largest=nulls_largest, **kwargs
+        )
+        # Fetch the order values alongside every row to merge on
+        query = query.add_columns(*[field for field, _ in order_clauses])
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            shard_rows = list(pool.map(lambda engine: self._fetch(engine, query), self.engines))
+
+        n_keys = len(order_clauses)
+        if n_keys:
+            is_desc = [desc_flag for _, desc_flag in order_clauses]
+            merged = heapq.merge(
+                *shard_rows, key=lambda row: SortKey(row[-n_keys:], is_desc, nulls_largest)
+            )
+        else:
+            merged = itertools.chain(*shard_rows)
+        rows = list(itertools.islice(merged, limit))
+
+        cursor = None
+        if n_keys and rows and limit is not None and len(rows) == limit:
+            cursor = tuple(rows[-1][-n_keys:])
+        return ShardedPage([self._item(class_, row, n_keys) for row in rows], cursor)
+
+    def _fetch(self, engine:Engine, query:Any)->list:
+        with orm.Session(engine) as session:
+            return session.execute(query).all()
+
+    def _item(self, class_:Any, row:Any, n_keys:int)->Any:
+        if isinstance(class_, type):
+            return row[0] #The ORM entity
+        return row[:len(row) - n_keys]
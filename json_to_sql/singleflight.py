@@ -0,0 +1,209 @@
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Hashable, Union
+from sqlalchemy import event, orm
+from sqlalchemy.engine import Result
+from sqlalchemy.orm.loading import merge_frozen_result
+
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Connection, Engine
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.sql.expression import Executable
+
+class SingleFlightTimeout(TimeoutError):
+    """Raised when waiting for an identical in-flight execution takes too long."""
+
+class SingleFlightStats:
+    __slots__ = ('executions', 'coalesced', 'timeouts', 'errors', '_lock')
+
+    def __init__(self):
+        self.executions = 0 #Calls that actually ran
+        self.coalesced = 0 #Calls that shared the result of another, i.e. executions saved
+        self.timeouts = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def __repr__(self)->str:
+        return f"<SingleFlightStats(executions={self.executions}, coalesced={self.coalesced}" \
+               f", timeouts={self.timeouts}, errors={self.errors})>"
+
+    def increment(self, name:str)->None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+class _LeaderCancelled(Exception):
+    """Set on the shared future when the task executing the call is cancelled."""
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Lets concurrent identical calls wait for one execution and share its result.
+
+    Only calls that overlap are coalesced, nothing is cached once the
+    execution finishes. Followers wait at most timeout seconds and get the
+    leader's exception re-raised when it fails.
+    """
+
+    def __init__(self, timeout:Union[float, None]=30.0):
+        self.timeout = timeout
+        self.stats = SingleFlightStats()
+        self._calls:dict[Hashable, _Call] = {}
+        self._futures:dict[tuple, asyncio.Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key:Hashable, fn:Callable[[], Any], timeout:Union[float, None]=None)->Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                self.stats.increment('errors')
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key] #Calls arriving from now on start a new execution
+                self.stats.increment('executions')
+                call.done.set()
+            return call.result
+
+        if not call.done.wait(self.timeout if timeout is None else timeout):
+            self.stats.increment('timeouts')
+            raise SingleFlightTimeout(f"Waited too long for in-flight call {key!r}")
+        self.stats.increment('coalesced')
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    async def do_async(
+        self,
+        key:Hashable,
+        fn:Callable[[], Awaitable[Any]],
+        timeout:Union[float, None]=None
+    )->Any:
+        loop = asyncio.get_running_loop()
+        flight_key = (loop, key) #Futures can only be awaited on their own loop
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else loop.time() + timeout
+        while True:
+            with self._lock:
+                future = self._futures.get(flight_key)
+                leader = future is None
+                if leader:
+                    future = self._futures[flight_key] = loop.create_future()
+            if leader:
+                try:
+                    result = await fn()
+                except asyncio.CancelledError:
+                    # Only the leader was cancelled, a follower takes over
+                    future.set_exception(_LeaderCancelled())
+                    future.exception()
+                    raise
+                except BaseException as e:
+                    future.set_exception(e)
+                    future.exception() #Retrieved here, followers may not exist
+                    self.stats.increment('errors')
+                    raise
+                else:
+                    future.set_result(result)
+                    return result
+                finally:
+                    with self._lock:
+                        del self._futures[flight_key]
+                    self.stats.increment('executions')
+
+            remaining = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                result = await asyncio.wait_for(asyncio.shield(future), remaining)
+            except asyncio.TimeoutError:
+                self.stats.increment('timeouts')
+                raise SingleFlightTimeout(f"Waited too long for in-flight call {key!r}")
+            except _LeaderCancelled:
+                continue
+            except Exception:
+                self.stats.increment('coalesced')
+                raise
+            self.stats.increment('coalesced')
+            return result
+
+def _freeze(value:Any)->Hashable:
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value) #Expanding IN parameters
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+def query_key(stmt:'Executable', bind:Union['Engine', 'Connection'])->tuple:
+    """The bind plus the compiled SQL and its parameters, equal for identical
+    queries on the same database. The bind keeps replicas and shards apart."""
+    compiled = stmt.compile(dialect=bind.dialect)
+    return bind, str(compiled), _freeze(compiled.params)
+
+# Set in Session.info while the session's transaction may hold uncommitted writes
+WRITES_KEY = 'json_to_sql.singleflight.writes'
+
+@event.listens_for(orm.Session, 'after_flush')
+def _flushed(session:orm.Session, flush_context:Any)->None:
+    session.info[WRITES_KEY] = True
+
+@event.listens_for(orm.Session, 'do_orm_execute')
+def _executed(orm_execute_state:orm.ORMExecuteState)->None:
+    if not orm_execute_state.is_select: #Bulk UPDATE / DELETE, INSERT or text that may write
+        orm_execute_state.session.info[WRITES_KEY] = True
+
+@event.listens_for(orm.Session, 'after_transaction_end')
+def _transaction_ended(session:orm.Session, transaction:orm.SessionTransaction)->None:
+    if transaction.parent is None:
+        session.info.pop(WRITES_KEY, None)
+
+def is_shareable(session:orm.Session)->bool:
+    """False when the session has pending changes or wrote in its transaction,
+    its reads then depend on its own state and must not be shared."""
+    if session.new or session.dirty or session.deleted:
+        return False
+    return not session.info.get(WRITES_KEY, False)
+
+def execute(
+    flight:SingleFlight,
+    session:orm.Session,
+    stmt:'Executable',
+    timeout:Union[float, None]=None
+)->Result:
+    """Execute stmt, e.g. a build_query statement, sharing the execution with
+    identical statements running concurrently in other threads.
+
+    The result is buffered once and merged into the session of every caller,
+    so each gets ORM objects attached to its own session. A session with
+    uncommitted changes executes on its own, see is_shareable.
+    """
+    if not is_shareable(session):
+        return session.execute(stmt)
+    key = query_key(stmt, session.get_bind())
+    frozen = flight.do(key, lambda: session.execute(stmt).freeze(), timeout)
+    return merge_frozen_result(session, stmt, frozen, load=False)()
+
+async def execute_async(
+    flight:SingleFlight,
+    session:'AsyncSession',
+    stmt:'Executable',
+    timeout:Union[float, None]=None
+)->Result:
+    """Asyncio counterpart of execute for an AsyncSession."""
+    if not is_shareable(session.sync_session):
+        return await session.execute(stmt)
+    key = query_key(stmt, session.sync_session.get_bind())
+
+    async def run()->Any:
+        return (await session.execute(stmt)).freeze()
+    frozen = await flight.do_async(key, run, timeout)
+    return merge_frozen_result(session.sync_session, stmt, frozen, load=False)()
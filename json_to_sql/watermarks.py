@@ -0,0 +1,45 @@
+import base64
+import datetime
+import json
+from typing import Any, NamedTuple, Union
+
+class Watermark(NamedTuple):
+    rows: Any #Highest watermark column value seen
+    tombstones: Any = None #Highest tombstone column value seen
+
+_ENCODERS = {
+    datetime.datetime: ('datetime', lambda v: v.isoformat(), datetime.datetime.fromisoformat),
+    datetime.date: ('date', lambda v: v.isoformat(), datetime.date.fromisoformat),
+    bool: ('bool', bool, bool),
+    int: ('int', int, int),
+    float: ('float', float, float),
+    str: ('str', str, str),
+}
+_DECODERS = {tag: decode for tag, _, decode in _ENCODERS.values()}
+
+def _encode_value(value:Any)->Union[list, None]:
+    if value is None:
+        return None
+    try:
+        tag, encode, _ = _ENCODERS[type(value)]
+    except KeyError:
+        raise ValueError(f"Cannot use {type(value).__name__} values as a watermark", None)
+    return [tag, encode(value)]
+
+def _decode_value(data:Union[list, None])->Any:
+    if data is None:
+        return None
+    tag, value = data
+    return _DECODERS[tag](value)
+
+def encode_watermark(watermark:Watermark)->str:
+    """Opaque, URL safe token handed to polling clients."""
+    data = [_encode_value(watermark.rows), _encode_value(watermark.tombstones)]
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(',', ':')).encode()).decode()
+
+def decode_watermark(token:str)->Watermark:
+    try:
+        rows, tombstones = json.loads(base64.urlsafe_b64decode(token.encode()))
+        return Watermark(_decode_value(rows), _decode_value(tombstones))
+    except (ValueError, TypeError, KeyError):
+        raise ValueError(f"Invalid watermark token {token!r}", None)
@@ -14,5 +14,6 @@ setup(
     url="https://github.com/koen199/fastapi-filter",
     setup_requires=["pytest-runner"],
     tests_require=["pytest", "fastapi", "sqlalchemy", "pydantic"],
-    install_requires=["sqlalchemy", "pydantic"]
+    install_requires=["sqlalchemy", "pydantic"],
+    extras_require={"columnar": ["numpy"]}
 )
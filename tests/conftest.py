@@ -4,6 +4,7 @@ import pytest
 from datetime import date
 
 from tests import petstore
+from json_to_sql.routing import create_pooled_engine
 
 def create_engine():
     engine = sqlalchemy.create_engine('sqlite:///:memory:')
@@ -33,7 +34,8 @@ def dogs(sqlserver_session_factory):
                 petstore.Toy(name='ball'),
                 petstore.Toy(name='rope')
             ],
-            address=petstore.Address(streetname='Molenstraat', number=40)
+            address=petstore.Address(streetname='Molenstraat', number=40),
+            attributes={'color': 'black', 'height': 60, 'vaccinated': True, 'checkup': {'date': '2023-01-05'}}
         ),
         petstore.Dog(
             name="Jasmine", dob=date(1997, 4, 20), weight=40,
@@ -41,12 +43,29 @@ def dogs(sqlserver_session_factory):
                 petstore.Toy(name='ball'),
                 petstore.Toy(name='squicky toy')
             ],
-            address=petstore.Address(streetname='Spoorweglaan', number=153)
-
+            address=petstore.Address(streetname='Spoorweglaan', number=153),
+            attributes={'color': 'brown', 'height': 45, 'vaccinated': False, 'checkup': {'date': '2024-06-30'}}
         ),
-        petstore.Dog(name="Quick", dob=date(2000, 5, 24), weight=90),
+        petstore.Dog(name="Quick", dob=date(2000, 5, 24), weight=90, attributes={'color': 'black', 'height': 9}),
         petstore.Dog(name="Jinx", dob=date(2005, 12, 31), weight=55),
         petstore.Dog(name="Kaya", dob=None, weight=50)
     ]
     session.add_all(doggos)
-    session.commit()
\ No newline at end of file
+    session.commit()
+
+@pytest.fixture
+def file_engines(tmp_path):
+    """Factory for SQLite file databases with the petstore schema, standing in
+    for replicas or shards."""
+    engines = []
+    def factory(names):
+        created = []
+        for name in names:
+            engine = create_pooled_engine(f"sqlite:///{tmp_path / name}.db", pool_size=2)
+            petstore.Base.metadata.create_all(engine)
+            created.append(engine)
+        engines.extend(created)
+        return created
+    yield factory
+    for engine in engines:
+        engine.dispose()
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy import Column, Integer, String, Float, Date, Table, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Date, Table, ForeignKey, JSON
 from pydantic import BaseModel
 import datetime
 from typing import List
@@ -48,6 +48,7 @@ class Dog(Base):
     name = Column(String, unique=True)
     dob = Column(Date)
     weight = Column(Float)
+    attributes = Column(JSON)
 
     toys = relationship("Toy", backref="dogs")
     address = relationship("Address", uselist=False)
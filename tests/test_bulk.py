@@ -0,0 +1,75 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql, postgresql
+
+from json_to_sql.bulk import build_delete, build_update, bulk_delete, bulk_update, EXISTS, IN
+from json_to_sql.schemas import FilterSchema
+from tests.petstore import Dog, Toy
+
+
+def weights(session):
+    return {dog.name: dog.weight for dog in session.scalars(sa.select(Dog)).all()}
+
+def test_bulk_update_without_joins(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="dateOfBirth", op="<", value="2000-01-01")]
+    count = bulk_update(session, Dog, filters, {'weight': 1}, property_map={'dateOfBirth': 'dob'})
+    assert count == 2
+    assert weights(session) == {'Xocomil': 1, 'Jasmine': 1, 'Quick': 90, 'Jinx': 55, 'Kaya': 50}
+
+@pytest.mark.parametrize('strategy', [IN, EXISTS])
+def test_bulk_update_with_joins(sqlserver_session_factory, dogs, strategy):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="toys.name", op="=", value="ball")]
+    count = bulk_update(session, Dog, filters, {'weight': 1}, strategy=strategy)
+    assert count == 2
+    assert weights(session) == {'Xocomil': 1, 'Jasmine': 1, 'Quick': 90, 'Jinx': 55, 'Kaya': 50}
+
+def test_bulk_update_synchronizes_loaded_objects(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    xocomil = session.scalars(sa.select(Dog).where(Dog.name == 'Xocomil')).one()
+    filters = [FilterSchema(field="toys.name", op="=", value="rope")]
+    bulk_update(session, Dog, filters, {'weight': 7})
+    assert xocomil.weight == 7
+
+def test_bulk_update_condition_groups(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [
+        FilterSchema(field="toys.name", op="=", value='ball', condition_group='A'),
+        FilterSchema(field="toys.name", op="=", value='rope', condition_group='B')
+    ]
+    assert bulk_update(session, Dog, filters, {'weight': 1}) == 1
+
+@pytest.mark.parametrize('strategy', [IN, EXISTS])
+def test_bulk_delete_core_table_with_joins(sqlserver_session_factory, dogs, strategy):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="dog.name", op="=", value="Jasmine")]
+    count = bulk_delete(session, Toy.__table__, filters, strategy=strategy)
+    assert count == 2
+    assert sorted(toy.name for toy in session.scalars(sa.select(Toy)).all()) == ['ball', 'rope']
+
+def test_bulk_delete_orm(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="weight", op=">=", value=90)]
+    assert bulk_delete(session, Dog, filters) == 2
+    assert sorted(weights(session)) == ['Jasmine', 'Jinx', 'Kaya']
+
+def test_strategy_per_dialect():
+    filters = [FilterSchema(field="toys.name", op="=", value="ball")]
+    sql = str(build_update(Dog, filters, {'weight': 1}, dialect='postgresql').compile(dialect=postgresql.dialect()))
+    assert 'EXISTS (SELECT' in sql
+    sql = str(build_delete(Dog, filters, dialect='sqlite').compile())
+    assert 'dog.id IN (SELECT dog.id' in sql
+    sql = str(build_delete(Dog, filters, dialect='mysql').compile(dialect=mysql.dialect()))
+    assert 'IN (SELECT anon_1.id' in sql
+
+def test_empty_filters_require_allow_all(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    with pytest.raises(ValueError):
+        build_delete(Dog, [])
+    with pytest.raises(ValueError):
+        bulk_update(session, Dog, [], {'weight': 1})
+    assert session.scalar(sa.select(sa.func.count()).select_from(Dog)) == 5
+    assert str(build_delete(Dog, [], allow_all=True)) == 'DELETE FROM dog'
+    assert bulk_update(session, Dog, [], {'weight': 1}, allow_all=True) == 5
+    assert bulk_delete(session, Dog, [], allow_all=True) == 5
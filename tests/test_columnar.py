@@ -0,0 +1,83 @@
+import pytest
+
+from json_to_sql.schemas import FilterSchema
+from tests.petstore import Dog
+
+np = pytest.importorskip('numpy')
+from json_to_sql.columnar import execute_columnar
+
+
+def test_columnar_all_columns(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    result = execute_columnar(session, Dog, [], order_by='name')
+    assert list(result) == ['id', 'name', 'dob', 'weight', 'attributes']
+    assert result['id'].dtype == np.int64
+    assert result['weight'].dtype == np.float64
+    assert result['dob'].dtype == np.dtype('datetime64[D]')
+    assert list(result['name']) == ['Jasmine', 'Jinx', 'Kaya', 'Quick', 'Xocomil']
+
+def test_columnar_masks_nulls(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    result = execute_columnar(session, Dog, [], order_by='name', columns=['name', 'dob'])
+    assert list(result['dob'].mask) == [False, False, True, False, False]
+    assert result['dob'][0] == np.datetime64('1997-04-20')
+
+def test_columnar_with_joins_and_property_map(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [
+        FilterSchema(field="toys.name", op="=", value="ball"),
+        FilterSchema(field="dateOfBirth", op="<", value="1995-01-01")
+    ]
+    result = execute_columnar(
+        session, Dog, filters, property_map={'dateOfBirth': 'dob'}, columns=['id', 'dateOfBirth'], batch_size=1
+    )
+    assert list(result['id']) == [1]
+    assert result['dateOfBirth'][0] == np.datetime64('1990-12-16')
+
+def test_columnar_batches(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    result = execute_columnar(session, Dog, [], order_by='weight', columns=['weight'], batch_size=2)
+    assert list(result['weight']) == [40.0, 50.0, 55.0, 90.0, 100.0]
+
+def test_columnar_empty_result(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="name", op="=", value="Fido")]
+    result = execute_columnar(session, Dog, filters, columns=['id'])
+    assert len(result['id']) == 0
+
+def test_columnar_core_table(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="toy.name", op="=", value="ball")]
+    result = execute_columnar(session, Dog.__table__, filters, order_by='name', columns=['name', 'weight'])
+    assert list(result['name']) == ['Jasmine', 'Xocomil']
+
+def test_columnar_json_arrays(sqlserver_session_factory):
+    session = sqlserver_session_factory()
+    session.add_all([Dog(name='Jinx', attributes=[1, 2]), Dog(name='Kaya', attributes=[3, 4])])
+    session.commit()
+    result = execute_columnar(session, Dog, [], order_by='name', columns=['attributes'])
+    assert result['attributes'].shape == (2,)
+    assert list(result['attributes']) == [[1, 2], [3, 4]]
+
+def test_columnar_default_columns_with_registry(sqlserver_session_factory, dogs):
+    from json_to_sql.registry import SchemaRegistry
+    from tests.petstore import DogSchema
+    registry = SchemaRegistry()
+    registry.register(DogSchema, Dog, property_map={'dateOfBirth': 'dob'})
+    session = sqlserver_session_factory()
+    result = execute_columnar(session, Dog, [], property_map=registry[DogSchema], order_by='dateOfBirth')
+    assert list(result['name']) == ['Kaya', 'Xocomil', 'Jasmine', 'Quick', 'Jinx']
+
+def test_columnar_streams_results(sqlserver_session_factory, dogs):
+    import sqlalchemy as sa
+    session = sqlserver_session_factory()
+    options = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        options.append(context.execution_options.get('stream_results'))
+    engine = session.get_bind()
+    sa.event.listen(engine, 'before_cursor_execute', record)
+    try:
+        execute_columnar(session, Dog, [], columns=['id'])
+    finally:
+        sa.event.remove(engine, 'before_cursor_execute', record)
+    assert options == [True]
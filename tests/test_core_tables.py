@@ -0,0 +1,65 @@
+import pytest
+from sqlalchemy.engine import Row
+
+import json_to_sql
+from json_to_sql.schemas import FilterSchema
+from tests.petstore import Dog, Toy, dog_toys
+
+
+def test_core_table_root_filter(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="name", op="like", value="J%")]
+    stmt = json_to_sql.build_query(Dog.__table__, filters, order_by='name')
+    results = session.execute(stmt).all()
+    assert all(isinstance(row, Row) for row in results)
+    assert [row.name for row in results] == ['Jasmine', 'Jinx']
+
+def test_core_table_property_map(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="dateOfBirth", op="<", value="2002-01-01")]
+    stmt = json_to_sql.build_query(Dog.__table__, filters, property_map={'dateOfBirth': 'dob'}, order_by='dateOfBirth')
+    results = session.execute(stmt).all()
+    assert [row.name for row in results] == ['Xocomil', 'Jasmine', 'Quick']
+
+def test_core_table_join_on_referencing_table(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="toy.name", op="=", value="rope")]
+    stmt = json_to_sql.build_query(Dog.__table__, filters)
+    results = session.execute(stmt).all()
+    assert [row.name for row in results] == ['Xocomil']
+
+def test_core_table_join_on_referenced_table(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="dog.weight", op=">", value=50)]
+    stmt = json_to_sql.build_query(Toy.__table__, filters, order_by='name')
+    results = session.execute(stmt).all()
+    assert [row.name for row in results] == ['ball', 'rope']
+
+def test_core_table_condition_groups(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [
+        FilterSchema(field="toy.name", op="=", value='ball', condition_group='A'),
+        FilterSchema(field="toy.name", op="=", value='rope', condition_group='B')
+    ]
+    stmt = json_to_sql.build_query(Dog.__table__, filters)
+    results = session.execute(stmt).all()
+    assert [row.name for row in results] == ['Xocomil']
+
+def test_core_association_table(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    session.execute(dog_toys.insert(), [{'dog_id': 1, 'toy_id': 2}, {'dog_id': 2, 'toy_id': 3}])
+    filters = [FilterSchema(field="dog.name", op="=", value="Jasmine")]
+    stmt = json_to_sql.build_query(dog_toys, filters, order_by='toy.name')
+    results = session.execute(stmt).all()
+    assert [(row.dog_id, row.toy_id) for row in results] == [(2, 3)]
+
+def test_core_subquery(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    heavy = json_to_sql.build_query(Dog.__table__, [FilterSchema(field="weight", op=">", value=50)]).subquery()
+    stmt = json_to_sql.build_query(heavy, [FilterSchema(field="name", op="like", value="%x%")], order_by='name')
+    results = session.execute(stmt).all()
+    assert [row.name for row in results] == ['Jinx', 'Xocomil']
+
+def test_core_table_unknown_relation():
+    with pytest.raises(KeyError):
+        json_to_sql.build_query(Dog.__table__, [FilterSchema(field="owner.name", op="=", value="Koen")])
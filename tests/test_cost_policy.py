@@ -0,0 +1,110 @@
+import pytest
+import sqlalchemy as sa
+
+import json_to_sql
+from json_to_sql.cost import CostPolicy, QueryCostError, QueryTimeoutError, execute_with_timeout
+from json_to_sql.schemas import FilterSchema
+from tests.petstore import Dog
+
+
+def test_join_depth_exceeded():
+    policy = CostPolicy(max_join_depth=0)
+    filters = [FilterSchema(field="toys.name", op="=", value="rope")]
+    with pytest.raises(QueryCostError) as e:
+        json_to_sql.build_query(Dog, filters, cost_policy=policy)
+    assert e.value.limit == 'max_join_depth'
+
+def test_aliases_exceeded_across_condition_groups():
+    policy = CostPolicy(max_aliases=1)
+    filters = [
+        FilterSchema(field="toys.name", op="=", value='ball', condition_group='A'),
+        FilterSchema(field="toys.name", op="=", value='rope', condition_group='B')
+    ]
+    with pytest.raises(QueryCostError) as e:
+        json_to_sql.build_query(Dog, filters, cost_policy=policy)
+    assert e.value.limit == 'max_aliases'
+
+def test_aliases_counts_order_by_joins():
+    policy = CostPolicy(max_aliases=1)
+    filters = [FilterSchema(field="toys.name", op="=", value='ball')]
+    json_to_sql.build_query(Dog, filters, cost_policy=policy)
+    with pytest.raises(QueryCostError):
+        json_to_sql.build_query(Dog, filters, order_by='address.streetname', cost_policy=policy)
+
+def test_in_values_exceeded():
+    policy = CostPolicy(max_in_values=3)
+    filters = [
+        FilterSchema(field="name", op="in", value=["Jinx", "Kaya"]),
+        FilterSchema(field="weight", op="in", value=[50, 55])
+    ]
+    with pytest.raises(QueryCostError) as e:
+        json_to_sql.build_query(Dog, filters, cost_policy=policy)
+    assert e.value.value == 4
+
+def test_filters_per_group_exceeded():
+    policy = CostPolicy(max_filters_per_group=1)
+    filters = [
+        FilterSchema(field="weight", op=">=", value=50),
+        FilterSchema(field="weight", op="<", value=56)
+    ]
+    with pytest.raises(QueryCostError):
+        json_to_sql.build_query(Dog, filters, cost_policy=policy)
+
+def test_leading_wildcard_rejected():
+    policy = CostPolicy(allow_leading_wildcard=False)
+    json_to_sql.build_query(Dog, [FilterSchema(field="name", op="like", value="J%")], cost_policy=policy)
+    with pytest.raises(QueryCostError):
+        json_to_sql.build_query(Dog, [FilterSchema(field="name", op="like", value="%x")], cost_policy=policy)
+
+def test_max_limit_is_mandatory(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    policy = CostPolicy(max_limit=2)
+    stmt = json_to_sql.build_query(Dog, [], order_by='name', cost_policy=policy)
+    results = session.scalars(stmt).all()
+    assert [dog.name for dog in results] == ['Jasmine', 'Jinx']
+    with pytest.raises(QueryCostError):
+        json_to_sql.build_query(Dog, [], limit=3, cost_policy=policy)
+
+def test_execute_with_timeout(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    stmt = json_to_sql.build_query(Dog, [FilterSchema(field="name", op="=", value="Kaya")])
+    results = execute_with_timeout(session, stmt, timeout=5).scalars().all()
+    assert [dog.name for dog in results] == ['Kaya']
+
+def test_execute_with_timeout_cancels_runaway_query(sqlserver_session_factory):
+    session = sqlserver_session_factory()
+    stmt = sa.text(
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 1000000000) "
+        "SELECT count(*) FROM c"
+    )
+    with pytest.raises(QueryTimeoutError):
+        execute_with_timeout(session, stmt, timeout=0.05)
+    # The progress handler is removed again afterwards
+    assert session.execute(sa.text("SELECT 1")).scalar() == 1
+
+class RecordingConnection:
+    """Stands in for a PostgreSQL connection, no server is available in the tests."""
+    def __init__(self):
+        self.statements = []
+    def exec_driver_sql(self, sql):
+        self.statements.append(sql)
+
+class FailingSession:
+    def execute(self, stmt):
+        raise sa.exc.OperationalError('SELECT 1', {}, Exception('connection lost'))
+
+def test_postgresql_timeout_is_clamped_and_reset():
+    from json_to_sql.cost import _execute_postgresql
+    conn = RecordingConnection()
+    with pytest.raises(sa.exc.OperationalError):
+        _execute_postgresql(FailingSession(), conn, sa.text('SELECT 1'), timeout=0.0001)
+    assert conn.statements == [
+        "SET LOCAL statement_timeout = 1", "SET LOCAL statement_timeout = DEFAULT"
+    ]
+
+def test_execute_with_timeout_rejects_other_dialects():
+    from sqlalchemy.dialects import mysql
+    class MySQLConnection(RecordingConnection):
+        dialect = mysql.dialect()
+    with pytest.raises(ValueError, match='sqlite, postgresql'):
+        execute_with_timeout(MySQLConnection(), sa.text('SELECT 1'), timeout=1)
@@ -0,0 +1,141 @@
+import datetime
+import random
+import pytest
+
+import json_to_sql
+from json_to_sql.evaluate import compile_predicate, filter_objects, sort_objects
+from json_to_sql.registry import SchemaRegistry
+from json_to_sql.schemas import FilterSchema, deserialize_filters
+from tests.petstore import Dog, DogSchema, ToySchema
+
+PROPERTY_MAP = {'dateOfBirth': 'dob', 'metadata': 'attributes'}
+
+CANDIDATES = [
+    ("name", ["=", "!=", "in", "like"], ["Xocomil", "Jinx", "Fido", "J%", "%a%", "x%", "%A%", "_uick", ["Jinx", "Kaya"]]),
+    ("weight", ["<", "<=", ">", ">=", "=", "!=", "in"], [40, 50, 55, 90.5, [50, 100]]),
+    ("dateOfBirth", ["<", "<=", ">", ">=", "=", "!="], ["1997-04-20", "2000-05-24T00:00:00", "2000-05-24T12:00:00", None]),
+    ("toys.name", ["=", "!=", "in", "like"], ["ball", "rope", "%o%", "%O%", ["rope", "squicky toy"]]),
+    ("toys.manufacturer", ["=", "!="], ["Hasbro", "Lego"]),
+    ("address.streetname", ["=", "!=", "like"], ["Molenstraat", "Spoor%"]),
+    ("address.number", ["<", ">=", "in"], [40, 100, [40, 153]]),
+    ("metadata.color", ["=", "!="], ["black", "brown"]),
+    ("metadata.height", ["<", ">", "in"], [10, 50, [9, 60]]),
+]
+
+def random_filters(rng):
+    filters = []
+    for _ in range(rng.randint(1, 3)):
+        field, ops, values = rng.choice(CANDIDATES)
+        op = rng.choice(ops)
+        value = rng.choice(values)
+        try:
+            deserialize_filters([FilterSchema(field=field, op=op, value=value)])
+        except ValueError:
+            continue #Invalid combination, e.g. like on a number
+        filters.append(FilterSchema(field=field, op=op, value=value, condition_group=rng.choice('AB')))
+    return filters
+
+def sql_ids(session, filters):
+    stmt = json_to_sql.build_query(Dog, filters, property_map=PROPERTY_MAP)
+    return sorted({dog.id for dog in session.scalars(stmt).unique().all()})
+
+def memory_ids(objects, filters):
+    return sorted(dog.id for dog in filter_objects(objects, filters, PROPERTY_MAP, dialect='sqlite'))
+
+
+def test_differential_random_filters(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    objects = session.scalars(json_to_sql.build_query(Dog, [])).all()
+    rng = random.Random(20261019)
+    for _ in range(300):
+        filters = random_filters(rng)
+        assert sql_ids(session, filters) == memory_ids(objects, filters), filters
+
+def test_condition_groups_match_same_element(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    objects = session.scalars(json_to_sql.build_query(Dog, [])).all()
+    same_toy = [
+        FilterSchema(field="toys.name", op="=", value="ball"),
+        FilterSchema(field="toys.name", op="=", value="rope")
+    ]
+    any_toy = [
+        FilterSchema(field="toys.name", op="=", value="ball", condition_group='A'),
+        FilterSchema(field="toys.name", op="=", value="rope", condition_group='B')
+    ]
+    assert sql_ids(session, same_toy) == memory_ids(objects, same_toy) == []
+    assert sql_ids(session, any_toy) == memory_ids(objects, any_toy) == [1]
+
+def test_differential_ordering(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    objects = session.scalars(json_to_sql.build_query(Dog, [])).all()
+    for order_by, is_desc in [
+        ('name', False), ('weight,name', [True, False]), ('dateOfBirth,name', False),
+        ('address.number,name', [True, True]), ('metadata.height,name', False)
+    ]:
+        stmt = json_to_sql.build_query(Dog, [], property_map=PROPERTY_MAP, order_by=order_by, is_desc=is_desc)
+        expected = [dog.id for dog in session.scalars(stmt).all()]
+        result = sort_objects(objects, order_by, is_desc, property_map=PROPERTY_MAP)
+        assert [dog.id for dog in result] == expected, order_by
+
+def test_order_through_collection_is_rejected(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    objects = session.scalars(json_to_sql.build_query(Dog, [])).all()
+    with pytest.raises(ValueError):
+        sort_objects(objects, 'toys.name')
+
+def test_pydantic_objects_with_registry():
+    registry = SchemaRegistry()
+    table = registry.register(DogSchema, Dog, property_map={'dateOfBirth': 'dob'})
+    schemas = [
+        DogSchema(id=1, name='Xocomil', dateOfBirth=datetime.date(1990, 12, 16), weight=100,
+                  toys=[ToySchema(id=1, name='ball'), ToySchema(id=2, name='rope')]),
+        DogSchema(id=2, name='Jasmine', dateOfBirth=datetime.date(1997, 4, 20), weight=40, toys=[]),
+    ]
+    # pydantic objects carry the API names, the property_map of the registry does not apply to them
+    filters = [FilterSchema(field="dateOfBirth", op="<", value="1995-01-01"), FilterSchema(field="toys.name", op="=", value="rope")]
+    assert [d.id for d in filter_objects(schemas, filters)] == [1]
+    assert [d.id for d in filter_objects(schemas, filters, table)] == [1]
+    assert [d.id for d in filter_objects(schemas, filters, {'dateOfBirth': 'dob'})] == [1]
+    assert [d.name for d in sort_objects(schemas, 'dateOfBirth', True, table)] == ['Jasmine', 'Xocomil']
+    # A registry table still rejects invalid filters up front
+    with pytest.raises(ValueError):
+        compile_predicate([FilterSchema(field="weight", op="like", value="4%")], table)
+
+def test_like_case_per_dialect():
+    predicate = compile_predicate([FilterSchema(field="name", op="like", value="x%")])
+    assert not predicate(Dog(name='Xocomil'))
+    assert predicate(Dog(name='xocomil'))
+    predicate = compile_predicate([FilterSchema(field="name", op="like", value="x%")], dialect='sqlite')
+    assert predicate(Dog(name='Xocomil'))
+
+def test_missing_attributes_raise():
+    with pytest.raises(AttributeError):
+        filter_objects([Dog(name='Xocomil')], [FilterSchema(field="dateOfBirth", op="<", value="1995-01-01")])
+
+def test_dates_against_datetimes_per_dialect():
+    dogs = [Dog(name='Quick', dob=datetime.date(2000, 5, 24))]
+    filters = [FilterSchema(field="dob", op="=", value="2000-05-24T00:00:00")]
+    assert filter_objects(dogs, filters) == dogs #Midnight of that day, like PostgreSQL
+    assert filter_objects(dogs, filters, dialect='sqlite') == [] #SQLite compares the stored text
+
+def test_json_values_are_cast_like_sql(sqlserver_session_factory):
+    session = sqlserver_session_factory()
+    session.add_all([Dog(name='Jinx', attributes={'height': '10'}), Dog(name='Kaya', attributes={'height': '30'})])
+    session.commit()
+    objects = session.scalars(json_to_sql.build_query(Dog, [])).all()
+    for filters in ([FilterSchema(field="metadata.height", op="<", value=20)],
+                    [FilterSchema(field="metadata.height", op="in", value=[10, 30])]):
+        assert sql_ids(session, filters) == memory_ids(objects, filters), filters
+
+def test_filters_without_matches_raise_type_error():
+    from json_to_sql.filters.filters import Filter
+    class ILikeFilter(Filter):
+        OP = 'ilike'
+        __slots__ = ()
+        def apply(self, stmt, attrib):
+            return stmt.where(attrib.ilike(self.value))
+        def is_valid(self):
+            return True
+    f = ILikeFilter(FilterSchema(field="name", op="ilike", value="x%"))
+    with pytest.raises(TypeError):
+        f.matches('Xocomil')
@@ -217,3 +217,51 @@ def test_filter_schema_raises_validationerror_on_bad_op():
     json = {"field": "weight", "op": "ne", "value": 124}
     with pytest.raises(KeyError):
         deserialize_filters([FilterSchema(**json)])
+
+def test_filters_are_immutable():
+    json = {"field": "toys.name", "op": "=", "value": "rope"}
+    [f] = deserialize_filters([FilterSchema(**json)])
+    assert f.fields == ('toys', 'name')
+    with pytest.raises(AttributeError):
+        f.value = 'ball'
+    with pytest.raises(AttributeError):
+        f.extra = 1
+
+def test_equal_filters_hash_equal():
+    json = {"field": "weight", "op": "in", "value": [3, 1, 2]}
+    other = {"field": "weight", "op": "in", "value": [1, 2, 3, 3]}
+    [f1, f2] = [deserialize_filters([FilterSchema(**j)])[0] for j in (json, other)]
+    assert f1 == f2
+    assert hash(f1) == hash(f2)
+    assert {f1: 'plan'}[f2] == 'plan'
+
+def test_filters_differ_by_op_and_condition_group():
+    lt = deserialize_filters([FilterSchema(field="weight", op="<", value=10)])[0]
+    lte = deserialize_filters([FilterSchema(field="weight", op="<=", value=10)])[0]
+    grouped = deserialize_filters([FilterSchema(field="weight", op="<", value=10, condition_group='A')])[0]
+    assert len({lt, lte, grouped}) == 3
+
+def test_deserialize_filters_deduplicates():
+    json = [
+        {"field": "name", "op": "=", "value": "Fido"},
+        {"field": "weight", "op": ">", "value": 10},
+        {"field": "name", "op": "=", "value": "Fido"}
+    ]
+    result = deserialize_filters([FilterSchema(**j) for j in json])
+    assert [type(f) for f in result] == [filters.EqualsFilter, filters.GTFilter]
+
+def test_filters_can_be_pickled_and_copied():
+    import copy
+    import pickle
+    json = {"field": "toys.name", "op": "in", "value": ["rope", "ball"]}
+    [f] = deserialize_filters([FilterSchema(**json)])
+    for clone in (pickle.loads(pickle.dumps(f)), copy.copy(f), copy.deepcopy(f)):
+        assert clone == f
+        assert hash(clone) == hash(f)
+        with pytest.raises(AttributeError):
+            clone.value = 'ball'
+
+def test_infilter_fails_on_unhashable_values():
+    json = {"field": "weight", "op": "in", "value": [[1, 2], [3]]}
+    with pytest.raises(ValueError):
+        deserialize_filters([FilterSchema(**json)])
@@ -0,0 +1,142 @@
+from typing import Any
+import pytest
+import sqlalchemy as sa
+from pydantic import BaseModel
+from sqlalchemy.dialects import postgresql, sqlite
+
+import json_to_sql
+from json_to_sql.json_paths import JSONPathUsage, json_path_index
+from json_to_sql.registry import SchemaRegistry
+from json_to_sql.schemas import FilterSchema
+from tests.petstore import Dog
+
+PROPERTY_MAP = {'metadata': 'attributes'}
+
+def names(session, filters, **kwargs):
+    stmt = json_to_sql.build_query(Dog, filters, property_map=PROPERTY_MAP, **kwargs)
+    return [dog.name for dog in session.scalars(stmt).all()]
+
+
+def test_json_equals(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="metadata.color", op="=", value="black")]
+    assert names(session, filters) == ['Xocomil', 'Quick']
+
+def test_json_range_compares_numerically(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="metadata.height", op="<", value=10)]
+    assert names(session, filters) == ['Quick']
+    filters = [FilterSchema(field="metadata.height", op=">=", value=45)]
+    assert names(session, filters) == ['Xocomil', 'Jasmine']
+
+def test_json_nested_path_and_dates(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="metadata.checkup.date", op=">", value="2024-01-01")]
+    assert names(session, filters) == ['Jasmine']
+
+def test_json_boolean_and_in(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    assert names(session, [FilterSchema(field="metadata.vaccinated", op="=", value=True)]) == ['Xocomil']
+    assert names(session, [FilterSchema(field="metadata.height", op="in", value=[9, 45])]) == ['Jasmine', 'Quick']
+
+def test_json_order_by(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="metadata.color", op="!=", value=None)]
+    assert names(session, filters, order_by='metadata.height') == ['Quick', 'Jasmine', 'Xocomil']
+
+def test_json_compiles_per_dialect():
+    filters = [
+        FilterSchema(field="metadata.color", op="=", value="black"),
+        FilterSchema(field="metadata.checkup.weight", op=">", value=10)
+    ]
+    stmt = json_to_sql.build_query(Dog, filters, property_map=PROPERTY_MAP)
+    sqlite_sql = str(stmt.compile(dialect=sqlite.dialect()))
+    assert """JSON_EXTRACT(dog.attributes, '$."color"')""" in sqlite_sql
+    assert """CAST(JSON_EXTRACT(dog.attributes, '$."checkup"."weight"') AS FLOAT)""" in sqlite_sql
+    postgresql_sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "(dog.attributes ->> 'color')" in postgresql_sql
+    assert "CAST((dog.attributes #>> '{checkup,weight}') AS FLOAT)" in postgresql_sql
+
+def test_json_rejects_unsafe_keys():
+    filters = [FilterSchema(field="metadata.color') OR 1=1 --", op="=", value="black")]
+    with pytest.raises(ValueError):
+        json_to_sql.build_query(Dog, filters, property_map=PROPERTY_MAP)
+
+def test_json_path_in_registry(sqlserver_session_factory, dogs):
+    class PetSchema(BaseModel):
+        name: str
+        metadata: Any
+
+    registry = SchemaRegistry()
+    table = registry.register(PetSchema, Dog, property_map=PROPERTY_MAP)
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="metadata.height", op=">", value=50)]
+    stmt = json_to_sql.build_query(Dog, filters, property_map=table)
+    assert [dog.name for dog in session.scalars(stmt).all()] == ['Xocomil']
+
+def test_json_index_is_used(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    usage = JSONPathUsage()
+    hot = [FilterSchema(field="metadata.height", op="<", value=10)]
+    for _ in range(3):
+        usage.record(Dog, hot, property_map=PROPERTY_MAP)
+    usage.record(Dog, [FilterSchema(field="metadata.color", op="=", value="black")], property_map=PROPERTY_MAP)
+
+    [index] = usage.suggest(min_count=2)
+    assert index.name == 'ix_dog_attributes_height_float'
+    usage.create_indexes(session.connection(), min_count=2)
+
+    stmt = json_to_sql.build_query(Dog, hot, property_map=PROPERTY_MAP)
+    sql = str(stmt.compile(dialect=session.bind.dialect, compile_kwargs={'literal_binds': True}))
+    plan = session.execute(sa.text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    assert any('ix_dog_attributes_height_float' in row[-1] for row in plan)
+
+def test_json_index_ddl():
+    index = json_path_index(Dog.attributes, ('color',))
+    Dog.__table__.indexes.discard(index)
+    ddl = str(sa.schema.CreateIndex(index).compile(dialect=sqlite.dialect()))
+    assert ddl == """CREATE INDEX ix_dog_attributes_color_text ON dog (JSON_EXTRACT(attributes, '$."color"'))"""
+
+def test_json_order_by_keeps_value_types():
+    stmt = json_to_sql.build_query(Dog, [], property_map=PROPERTY_MAP, order_by='metadata.checkup.height')
+    postgresql_sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "ORDER BY CAST((dog.attributes #> '{checkup,height}') AS JSONB)" in postgresql_sql
+    sqlite_sql = str(stmt.compile(dialect=sqlite.dialect()))
+    assert """ORDER BY JSON_EXTRACT(dog.attributes, '$."checkup"."height"')""" in sqlite_sql
+
+def test_json_keyset_pagination(sqlserver_session_factory, dogs):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="metadata.height", op=">", value=0)]
+    assert names(session, filters, order_by='metadata.height', limit=2) == ['Quick', 'Jasmine']
+    assert names(session, filters, order_by='metadata.height', limit=2, after=(45,)) == ['Xocomil']
+
+def test_json_paths_are_not_joins():
+    from json_to_sql.cost import CostPolicy
+    policy = CostPolicy(max_join_depth=0, max_aliases=0)
+    filters = [FilterSchema(field="metadata.checkup.date", op=">", value="2024-01-01")]
+    json_to_sql.build_query(Dog, filters, property_map=PROPERTY_MAP, order_by='metadata.height', cost_policy=policy)
+
+def test_json_usage_resolves_nested_registry_tables():
+    from typing import Optional
+    from sqlalchemy.orm import declarative_base, relationship
+    Base = declarative_base()
+    class Kennel(Base):
+        __tablename__ = 'kennel'
+        id = sa.Column(sa.Integer, primary_key=True)
+        info = sa.Column(sa.JSON)
+    class Pet(Base):
+        __tablename__ = 'pet'
+        id = sa.Column(sa.Integer, primary_key=True)
+        kennel_id = sa.Column(sa.Integer, sa.ForeignKey('kennel.id'))
+        kennel = relationship(Kennel)
+    class KennelSchema(BaseModel):
+        details: Any
+    class PetSchema(BaseModel):
+        home: Optional[KennelSchema]
+
+    registry = SchemaRegistry()
+    registry.register(KennelSchema, Kennel, property_map={'details': 'info'})
+    table = registry.register(PetSchema, Pet, property_map={'home': 'kennel'})
+    usage = JSONPathUsage()
+    usage.record(Pet, [FilterSchema(field="home.details.rating", op=">", value=3)], property_map=table)
+    assert list(usage.counts) == [(Kennel.__table__.c.info, ('rating',), sa.Float)]
@@ -77,4 +77,21 @@ def test_no_filter_order_by_name_and_weight_as_string(sqlserver_session_factory:
     stmt = json_to_sql.build_query(Dog, filters, order_by='name,weight')
     results = session.scalars(stmt).all()
     expected_order = [2, 4, 5, 3, 1]    
-    assert expected_order == [dog.id for dog in results]
\ No newline at end of file
+    assert expected_order == [dog.id for dog in results]
+
+def test_keyset_pagination_with_nulls(sqlserver_session_factory:Session, dogs):
+    session = sqlserver_session_factory()
+    session.add(Dog(name="Bolt", dob=None, weight=20))
+    session.commit()
+    for is_desc in ([True, False], [False, False], [False, True]):
+        stmt = json_to_sql.build_query(Dog, [], order_by='dob,id', is_desc=is_desc)
+        expected = [dog.id for dog in session.scalars(stmt).all()]
+        pages, after = [], None
+        while True:
+            stmt = json_to_sql.build_query(Dog, [], order_by='dob,id', is_desc=is_desc, limit=2, after=after)
+            page = session.scalars(stmt).all()
+            if not page:
+                break
+            pages.extend(dog.id for dog in page)
+            after = (page[-1].dob, page[-1].id)
+        assert pages == expected, is_desc
@@ -0,0 +1,95 @@
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import exc, orm
+
+import json_to_sql
+from json_to_sql.routing import ReplicaRouter, LEAST_LOADED, create_pooled_engine
+from json_to_sql.schemas import FilterSchema
+from tests.petstore import Dog
+
+
+def add_dog(engine, name, weight=10):
+    with orm.Session(engine) as session, session.begin():
+        session.add(Dog(name=name, weight=weight))
+
+def served_by(router_or_session):
+    stmt = json_to_sql.build_query(Dog, [FilterSchema(field="weight", op=">", value=0)])
+    return [dog.name for dog in router_or_session.read(stmt).scalars().all()]
+
+@pytest.fixture
+def cluster(file_engines):
+    primary, replica1, replica2 = file_engines(['primary', 'replica1', 'replica2'])
+    for engine, name in [(primary, 'P'), (replica1, 'R1'), (replica2, 'R2')]:
+        add_dog(engine, name)
+    return primary, replica1, replica2
+
+
+def test_round_robin_over_replicas(cluster):
+    primary, replica1, replica2 = cluster
+    router = ReplicaRouter(primary, [replica1, replica2])
+    assert [served_by(router) for _ in range(4)] == [['R1'], ['R2'], ['R1'], ['R2']]
+
+def test_least_loaded_replica(cluster):
+    primary, replica1, replica2 = cluster
+    router = ReplicaRouter(primary, [replica1, replica2], strategy=LEAST_LOADED)
+    with replica1.connect():
+        assert served_by(router) == ['R2']
+    with replica2.connect():
+        assert served_by(router) == ['R1']
+
+def test_failed_replica_falls_back(cluster, tmp_path):
+    primary, replica1, _ = cluster
+    broken = create_pooled_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReplicaRouter(primary, [broken, replica1])
+    assert served_by(router) == ['R1']
+    assert served_by(router) == ['R1'] #The broken replica is skipped now
+
+def test_all_replicas_failed_uses_primary(cluster, tmp_path):
+    primary, _, _ = cluster
+    broken = create_pooled_engine(f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+    router = ReplicaRouter(primary, [broken])
+    assert served_by(router) == ['P']
+
+def test_primary_failure_is_raised(tmp_path):
+    broken = create_pooled_engine(f"sqlite:///{tmp_path / 'missing' / 'primary.db'}")
+    router = ReplicaRouter(broken)
+    with pytest.raises(exc.OperationalError):
+        served_by(router)
+
+def test_read_your_writes_pins_to_primary(cluster):
+    primary, replica1, replica2 = cluster
+    router = ReplicaRouter(primary, [replica1, replica2])
+    session = router.session(read_your_writes=True)
+    assert served_by(session) == ['R1']
+    with session.write() as s:
+        s.add(Dog(name='P2', weight=5))
+    assert served_by(session) == ['P', 'P2']
+    assert served_by(router) == ['R2'] #Other readers are not pinned
+
+def test_without_read_your_writes_reads_stay_on_replicas(cluster):
+    primary, replica1, _ = cluster
+    router = ReplicaRouter(primary, [replica1])
+    session = router.session()
+    with session.write() as s:
+        s.add(Dog(name='P2', weight=5))
+    assert served_by(session) == ['R1']
+
+def test_statement_errors_do_not_fail_over(cluster):
+    primary, replica1, replica2 = cluster
+    router = ReplicaRouter(primary, [replica1, replica2])
+    with pytest.raises(exc.OperationalError):
+        router.read(sa.text("SELECT * FROM no_such_table"))
+    assert router._down_until == {}
+    assert [served_by(router) for _ in range(2)] == [['R2'], ['R1']]
+
+def test_lost_connection_fails_over(cluster, monkeypatch):
+    primary, replica1, replica2 = cluster
+    router = ReplicaRouter(primary, [replica1, replica2])
+    execute = router._execute
+    def disconnecting(connection, stmt):
+        if connection.engine is replica1:
+            raise exc.OperationalError('SELECT 1', {}, Exception('server closed'), connection_invalidated=True)
+        return execute(connection, stmt)
+    monkeypatch.setattr(router, '_execute', disconnecting)
+    assert served_by(router) == ['R2']
+    assert list(router._down_until) == [replica1]
@@ -0,0 +1,94 @@
+from typing import Optional
+import pytest
+from pydantic import BaseModel, Field
+
+import json_to_sql
+from json_to_sql.registry import SchemaRegistry, ORDINAL_OPS, TEXT_OPS
+from json_to_sql.schemas import FilterSchema
+from tests.petstore import Dog, Toy, Address, DogSchema, ToySchema
+
+
+class AddressSchema(BaseModel):
+    street: str = Field(alias='streetName')
+    number: int
+
+class AliasedDogSchema(BaseModel):
+    id: int
+    name: str
+    address: Optional[AddressSchema]
+    toys: list[ToySchema]
+
+
+@pytest.fixture
+def registry():
+    registry = SchemaRegistry()
+    registry.register(DogSchema, Dog, property_map={'dateOfBirth': 'dob'})
+    registry.register(AddressSchema, Address, property_map={'street': 'streetname'})
+    registry.register(AliasedDogSchema, Dog)
+    return registry
+
+
+def test_registry_resolves_fields_per_level(registry):
+    table = registry[DogSchema]
+    assert table.resolve('dateOfBirth').name == 'dob'
+    assert table.resolve('dateOfBirth').ops == ORDINAL_OPS
+    assert table.resolve('toys').nested.class_ is Toy
+    assert table.resolve_path(['toys', 'name']).ops == TEXT_OPS
+
+def test_registry_resolves_aliases(registry):
+    table = registry[AliasedDogSchema]
+    assert table.resolve_path(['address', 'streetName']).name == 'streetname'
+    assert table.resolve_path(['address', 'street']).name == 'streetname'
+
+def test_registry_rejects_unknown_field(registry):
+    filters = [FilterSchema(field="dob", op="=", value="2000-05-24")]
+    with pytest.raises(KeyError):
+        json_to_sql.build_query(Dog, filters, property_map=registry[DogSchema])
+
+def test_registry_rejects_unknown_nested_field(registry):
+    filters = [FilterSchema(field="toys.manufacturer", op="=", value="Hasbro")]
+    with pytest.raises(KeyError):
+        json_to_sql.build_query(Dog, filters, property_map=registry[DogSchema])
+
+def test_registry_rejects_disallowed_op(registry):
+    filters = [FilterSchema(field="weight", op="like", value="5%")]
+    with pytest.raises(ValueError):
+        json_to_sql.build_query(Dog, filters, property_map=registry[DogSchema])
+
+def test_registry_rejects_bad_property_map():
+    registry = SchemaRegistry()
+    with pytest.raises(KeyError):
+        registry.register(DogSchema, Dog, property_map={'dateOfBirth': 'birthday'})
+
+def test_registry_query(sqlserver_session_factory, dogs, registry):
+    session = sqlserver_session_factory()
+    filters = [
+        FilterSchema(field="dateOfBirth", op="<", value="2002-01-01"),
+        FilterSchema(field="toys.name", op="=", value="rope")
+    ]
+    stmt = json_to_sql.build_query(Dog, filters, property_map=registry[DogSchema])
+    results = session.scalars(stmt).all()
+    assert [dog.name for dog in results] == ['Xocomil']
+
+def test_registry_query_nested_alias(sqlserver_session_factory, dogs, registry):
+    session = sqlserver_session_factory()
+    filters = [FilterSchema(field="address.streetName", op="=", value="Spoorweglaan")]
+    stmt = json_to_sql.build_query(Dog, filters, property_map=registry[AliasedDogSchema])
+    results = session.scalars(stmt).all()
+    assert [dog.name for dog in results] == ['Jasmine']
+
+def test_order_by_nested_string(sqlserver_session_factory, dogs, registry):
+    session = sqlserver_session_factory()
+    stmt = json_to_sql.build_query(
+        Dog, [], property_map=registry[AliasedDogSchema], order_by='address.street,name'
+    )
+    results = session.scalars(stmt).all()
+    assert [dog.name for dog in results] == ['Jinx', 'Kaya', 'Quick', 'Xocomil', 'Jasmine']
+
+def test_order_by_rejects_collection(registry):
+    with pytest.raises(ValueError):
+        json_to_sql.build_query(Dog, [], property_map=registry[DogSchema], order_by='toys.name')
+    with pytest.raises(ValueError):
+        json_to_sql.build_query(Dog, [], order_by='toys.name')
+    with pytest.raises(ValueError): #address.dog_id is not unique, so a dog may have several
+        json_to_sql.build_query(Dog.__table__, [], order_by='address.streetname')
@@ -0,0 +1,75 @@
+from datetime import date
+import pytest
+from sqlalchemy import orm
+
+from json_to_sql.schemas import FilterSchema
+from json_to_sql.sharding import ShardedExecutor
+from tests.petstore import Dog, Toy
+
+
+SHARDS = [
+    [("Xocomil", 100, ['ball', 'rope']), ("Kaya", 50, [])],
+    [("Jasmine", 40, ['ball']), ("Quick", 90, []), ("Bolt", 55, ['rope'])],
+    [("Jinx", 55, []), ("Aiko", 70, ['ball'])],
+]
+
+@pytest.fixture
+def shards(file_engines):
+    engines = file_engines([f"shard{i}" for i in range(len(SHARDS))])
+    for engine, doggos in zip(engines, SHARDS):
+        with orm.Session(engine) as session, session.begin():
+            session.add_all([
+                Dog(name=name, weight=weight, dob=date(2000, 1, 1), toys=[Toy(name=t) for t in toys])
+                for name, weight, toys in doggos
+            ])
+    return engines
+
+
+def test_merges_ordered_results(shards):
+    executor = ShardedExecutor(shards)
+    page = executor.query(Dog, [], order_by='name')
+    assert [dog.name for dog in page.items] == ['Aiko', 'Bolt', 'Jasmine', 'Jinx', 'Kaya', 'Quick', 'Xocomil']
+    assert page.cursor is None
+
+def test_merges_mixed_directions(shards):
+    executor = ShardedExecutor(shards)
+    page = executor.query(Dog, [], order_by='weight,name', is_desc=[True, False])
+    assert [dog.name for dog in page.items] == ['Xocomil', 'Quick', 'Aiko', 'Bolt', 'Jinx', 'Kaya', 'Jasmine']
+
+def test_filters_are_applied_on_every_shard(shards):
+    executor = ShardedExecutor(shards)
+    filters = [FilterSchema(field="toys.name", op="=", value="ball")]
+    page = executor.query(Dog, filters, order_by='name')
+    assert [dog.name for dog in page.items] == ['Aiko', 'Jasmine', 'Xocomil']
+
+def test_limit_and_cursor_pagination(shards):
+    executor = ShardedExecutor(shards)
+    page = executor.query(Dog, [], order_by='weight,name', limit=3)
+    assert [dog.name for dog in page.items] == ['Jasmine', 'Kaya', 'Bolt']
+    assert page.cursor == (55, 'Bolt')
+
+    page = executor.query(Dog, [], order_by='weight,name', limit=3, after=page.cursor)
+    assert [dog.name for dog in page.items] == ['Jinx', 'Aiko', 'Quick']
+
+    page = executor.query(Dog, [], order_by='weight,name', limit=3, after=page.cursor)
+    assert [dog.name for dog in page.items] == ['Xocomil']
+    assert page.cursor is None
+
+def test_limit_is_pushed_down(shards, monkeypatch):
+    executor = ShardedExecutor(shards)
+    fetched = []
+    fetch = executor._fetch
+    def recording_fetch(engine, query):
+        rows = fetch(engine, query)
+        fetched.append(rows)
+        return rows
+    monkeypatch.setattr(executor, '_fetch', recording_fetch)
+    executor.query(Dog, [], order_by='name', limit=1)
+    assert [len(rows) for rows in fetched] == [1, 1, 1]
+
+def test_cost_policy_limit_is_merged(shards):
+    from json_to_sql.cost import CostPolicy
+    executor = ShardedExecutor(shards)
+    page = executor.query(Dog, [], order_by='weight,name', cost_policy=CostPolicy(max_limit=2))
+    assert [dog.name for dog in page.items] == ['Jasmine', 'Kaya']
+    assert page.cursor == (50, 'Kaya')
@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+import json_to_sql
+from json_to_sql.schemas import FilterSchema
+from json_to_sql.singleflight import SingleFlight, SingleFlightTimeout, execute, execute_async, query_key
+from tests.petstore import Dog
+
+
+def run_concurrently(n, fn):
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        futures = [pool.submit(fn) for _ in range(n)]
+        return [f.exception() or f.result() for f in futures]
+
+def slow(release, result='value'):
+    def fn():
+        release.wait(5)
+        return result
+    return fn
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return 'value'
+    threading.Timer(0.2, release.set).start()
+    results = run_concurrently(8, lambda: flight.do('key', fn))
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+    assert (flight.stats.executions, flight.stats.coalesced) == (1, 7)
+
+def test_finished_calls_are_not_cached():
+    flight = SingleFlight()
+    assert flight.do('key', lambda: 1) == 1
+    assert flight.do('key', lambda: 2) == 2
+    assert flight.stats.executions == 2
+
+def test_errors_propagate_to_followers():
+    flight = SingleFlight()
+    release = threading.Event()
+    def fn():
+        release.wait(5)
+        raise RuntimeError('boom')
+    threading.Timer(0.2, release.set).start()
+    results = run_concurrently(4, lambda: flight.do('key', fn))
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert (flight.stats.executions, flight.stats.errors, flight.stats.coalesced) == (1, 1, 3)
+
+def test_bounded_wait():
+    flight = SingleFlight(timeout=0.05)
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do('key', slow(release)))
+    leader.start()
+    time.sleep(0.05)
+    with pytest.raises(SingleFlightTimeout):
+        flight.do('key', lambda: 'never called')
+    release.set()
+    leader.join()
+    assert flight.stats.timeouts == 1
+
+def test_async_tasks_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'value'
+    async def main():
+        return await asyncio.gather(*[flight.do_async('key', fn) for _ in range(5)])
+    assert asyncio.run(main()) == ['value'] * 5
+    assert len(calls) == 1
+    assert flight.stats.coalesced == 4
+
+def test_async_errors_and_timeouts():
+    flight = SingleFlight()
+    async def failing():
+        await asyncio.sleep(0.05)
+        raise RuntimeError('boom')
+    async def main():
+        return await asyncio.gather(*[flight.do_async('key', failing) for _ in range(3)], return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(main()))
+    assert (flight.stats.errors, flight.stats.coalesced) == (1, 2)
+
+    async def timing_out():
+        leader = asyncio.ensure_future(flight.do_async('slow', lambda: asyncio.sleep(0.2)))
+        await asyncio.sleep(0)
+        with pytest.raises(SingleFlightTimeout):
+            await flight.do_async('slow', lambda: asyncio.sleep(0), timeout=0.01)
+        await leader
+    asyncio.run(timing_out())
+
+def test_query_key_includes_parameters_and_bind():
+    engine, other = sa.create_engine('sqlite://'), sa.create_engine('sqlite://')
+    stmt = lambda names: json_to_sql.build_query(Dog, [FilterSchema(field="name", op="in", value=names)])
+    assert query_key(stmt(['Jinx', 'Kaya']), engine) == query_key(stmt(['Kaya', 'Jinx']), engine)
+    assert query_key(stmt(['Jinx']), engine) != query_key(stmt(['Kaya']), engine)
+    assert query_key(stmt(['Jinx']), engine) != query_key(stmt(['Jinx']), other)
+
+def test_execute_merges_into_each_session(file_engines):
+    [engine] = file_engines(['singleflight'])
+    with orm.Session(engine) as session, session.begin():
+        session.add_all([Dog(name='Jinx', weight=55), Dog(name='Kaya', weight=50)])
+
+    @sa.event.listens_for(engine, 'before_cursor_execute')
+    def slow_query(*args):
+        time.sleep(0.2)
+
+    flight = SingleFlight()
+    stmt = json_to_sql.build_query(Dog, [FilterSchema(field="weight", op=">", value=40)], order_by='name')
+    def fetch():
+        with orm.Session(engine) as session:
+            dogs = execute(flight, session, stmt).scalars().all()
+            assert all(dog in session for dog in dogs)
+            return [dog.name for dog in dogs]
+    assert run_concurrently(4, fetch) == [['Jinx', 'Kaya']] * 4
+    assert flight.stats.executions == 1
+
+    with orm.Session(engine) as session:
+        rows = execute(flight, session, stmt.with_only_columns(Dog.name)).all()
+        assert [row.name for row in rows] == ['Jinx', 'Kaya']
+
+def test_execute_async(tmp_path):
+    pytest.importorskip('aiosqlite')
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+    from tests.petstore import Base
+
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as session, session.begin():
+            session.add(Dog(name='Jinx', weight=55))
+        flight = SingleFlight()
+        stmt = json_to_sql.build_query(Dog, [FilterSchema(field="name", op="=", value="Jinx")])
+        async def fetch():
+            async with AsyncSession(engine) as session:
+                return [dog.name for dog in (await execute_async(flight, session, stmt)).scalars().all()]
+        results = await asyncio.gather(*[fetch() for _ in range(3)])
+        await engine.dispose()
+        return results, flight.stats.executions
+    results, executions = asyncio.run(main())
+    assert results == [['Jinx']] * 3
+    assert executions == 1
+
+def test_async_follower_takes_over_cancelled_leader():
+    flight = SingleFlight()
+    calls = []
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return 'value'
+    async def main():
+        leader = asyncio.ensure_future(flight.do_async('key', fn))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(flight.do_async('key', fn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        leader.cancel()
+        results = await asyncio.gather(*followers)
+        assert leader.cancelled()
+        return results
+    assert asyncio.run(main()) == ['value'] * 3
+    assert len(calls) == 2
+    assert flight.stats.coalesced == 2
+
+def test_execute_keeps_databases_apart(file_engines):
+    engines = file_engines(['shard0', 'shard1'])
+    for engine, name in zip(engines, ['Jinx', 'Kaya']):
+        with orm.Session(engine) as session, session.begin():
+            session.add(Dog(name=name, weight=50))
+        sa.event.listen(engine, 'before_cursor_execute', lambda *args: time.sleep(0.2))
+
+    flight = SingleFlight()
+    stmt = json_to_sql.build_query(Dog, [])
+    def fetch(engine):
+        with orm.Session(engine) as session:
+            return [dog.name for dog in execute(flight, session, stmt).scalars().all()]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        assert list(pool.map(fetch, engines)) == [['Jinx'], ['Kaya']]
+    assert flight.stats.executions == 2
+
+def test_sessions_with_own_changes_are_not_shared(file_engines):
+    from json_to_sql.singleflight import is_shareable
+    [engine] = file_engines(['writes'])
+    with orm.Session(engine) as session, session.begin():
+        session.add(Dog(name='A', weight=10))
+
+    flight = SingleFlight(timeout=0.1)
+    stmt = json_to_sql.build_query(Dog, [], order_by='name')
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do(query_key(stmt, engine), slow(release)))
+    leader.start()
+    time.sleep(0.05)
+    try:
+        with orm.Session(engine) as session:
+            with pytest.raises(SingleFlightTimeout): #A clean session waits for the leader
+                execute(flight, session, stmt)
+            session.add(Dog(name='B', weight=20))
+            assert not is_shareable(session)
+            assert [dog.name for dog in execute(flight, session, stmt).scalars()] == ['A', 'B']
+            assert not is_shareable(session) #Flushed, but not committed
+            session.commit()
+            assert is_shareable(session)
+            session.execute(sa.update(Dog).values(weight=5))
+            assert not is_shareable(session)
+            session.rollback()
+            assert is_shareable(session)
+    finally:
+        release.set()
+        leader.join()